@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from enum import Enum
 from typing import Optional, Tuple, TYPE_CHECKING
 
+import activation
 import color
 import exceptions
 
@@ -10,7 +12,17 @@ if TYPE_CHECKING:
    from entity import Actor, Entity, Item
 
 
+class ActionResult(Enum):
+    """Outcome of validating an action, the value is the message shown to the player."""
+
+    OK = ""
+    BLOCKED = "That way is blocked."
+    NO_TARGET = "Nothing to attack."
+
+
 class Action:
+    cost = 100  # Time units this action takes an actor of normal speed.
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()
         self.entity = entity
@@ -31,6 +43,13 @@ class Action:
         """
         raise NotImplementedError()
 
+    def validate(self) -> ActionResult:
+        """Check whether this action can be performed, without side effects and without raising."""
+        return ActionResult.OK
+
+    def can_perform(self) -> bool:
+        return self.validate() is ActionResult.OK
+
 
 class WaitAction(Action):
     def perform(self) -> None:
@@ -64,54 +83,75 @@ class ActionWithDirection(Action):
 
 
 class MeleeAction(ActionWithDirection):
+    def validate(self) -> ActionResult:
+        if not self.target_actor:
+            return ActionResult.NO_TARGET
+        return ActionResult.OK
+
     def perform(self) -> None:
         target = self.target_actor
         if not target:
-            raise exceptions.Impossible("Nothing to attack.")
+            raise exceptions.Impossible(ActionResult.NO_TARGET.value)
 
         damage = self.entity.fighter.power - target.fighter.defense
 
-        attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
+        # The noise of the fight wakes up the monsters around.
+        self.engine.game_map.wake_actors(*self.dest_xy, activation.COMBAT_NOISE_RADIUS)
+
         if self.entity is self.engine.player:
             attack_color = color.player_atk
         else:
             attack_color = color.enemy_atk
 
-        attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
         if damage > 0:
             self.engine.message_log.add_message(
-                f"{attack_desc} for {damage} hit points.", attack_color
+                "{0!c} attacks {1} for {2} hit points.", attack_color,
+                args=(self.entity.name, target.name, damage),
             )
-            target.fighter.hp -= damage
+            target.fighter.take_damage(damage, source=self.entity.name)
         else:
             self.engine.message_log.add_message(
-                f"{attack_desc} but does no damage.", attack_color
+                "{0!c} attacks {1} but does no damage.", attack_color,
+                args=(self.entity.name, target.name),
             )
 
 
 class MovementAction(ActionWithDirection):
-    def perform(self) -> None:
+    def validate(self) -> ActionResult:
         dest_x, dest_y = self.dest_xy
 
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
             # Destination is out of bounds.
-            raise exceptions.Impossible("That way is blocked.")
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+            return ActionResult.BLOCKED
+        if not self.engine.game_map.walkable[dest_x, dest_y]:
             # Destination is blocked by a tile.
-            raise exceptions.Impossible("That way is blocked.")
+            return ActionResult.BLOCKED
         if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
             # Destination is blocked by an entity.
-            raise exceptions.Impossible("That way is blocked.")
+            return ActionResult.BLOCKED
+        return ActionResult.OK
+
+    def perform(self) -> None:
+        result = self.validate()
+        if result is not ActionResult.OK:
+            raise exceptions.Impossible(result.value)
 
         self.entity.move(self.dx, self.dy)
 
 
 class BumpAction(ActionWithDirection):
-    def perform(self) -> None:
+    def resolve(self) -> ActionWithDirection:
+        """Return the action this bump amounts to: an attack if there is an actor in the way, a move otherwise."""
         if self.target_actor:
-            return MeleeAction(self.entity, self.dx, self.dy).perform()
+            return MeleeAction(self.entity, self.dx, self.dy)
         else:
-            return MovementAction(self.entity, self.dx, self.dy).perform()
+            return MovementAction(self.entity, self.dx, self.dy)
+
+    def validate(self) -> ActionResult:
+        return self.resolve().validate()
+
+    def perform(self) -> None:
+        return self.resolve().perform()
 
 
 class ItemAction(Action):
@@ -150,23 +190,19 @@ class PickupAction(Action):
         super().__init__(entity)
 
     def perform(self) -> None:
-        actor_location_x = self.entity.x
-        actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if len(inventory.items) >= inventory.capacity:
-                    raise exceptions.Impossible("Your inventory is full.")
-
-                self.engine.game_map.entities.remove(item)
-                item.parent = self.entity.inventory
-                inventory.items.append(item)
+        item = self.engine.game_map.top_item_at(self.entity.x, self.entity.y)
+        if item is None:
+            raise exceptions.Impossible("There is nothing here to pick up.")
+        if len(inventory.items) >= inventory.capacity:
+            raise exceptions.Impossible("Your inventory is full.")
 
-                self.engine.message_log.add_message(f"You picked up the {item.name}!")
-                return
+        self.engine.game_map.remove_entity(item)
+        item.parent = self.entity.inventory
+        inventory.items.append(item)
 
-        raise exceptions.Impossible("There is nothing here to pick up.")
+        self.engine.message_log.add_message("You picked up the {0}!", args=(item.name,))
 
 
 class TakeStairsAction(Action):
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+REGION_SIZE = 8  # Side of the square map regions dormant actors are bucketed by.
+
+PROXIMITY_RADIUS = 2  # Dormant actors this close to the player wake up even without seeing them.
+COMBAT_NOISE_RADIUS = 6  # Dormant actors this close to a fight are woken by the noise.
+
+
+class DormantIndex:
+    """
+    Sleeping actors, bucketed by coarse map region.
+
+    Dormant actors are kept off the turn schedule entirely. Waking them only looks at the
+    regions around the trigger, so the cost does not depend on how many actors are asleep.
+    Dicts are used as ordered sets to keep the wake up order deterministic.
+    """
+
+    def __init__(self, region_size: int = REGION_SIZE):
+        self.region_size = region_size
+        self._regions: Dict[Tuple[int, int], Dict[Actor, None]] = {}
+        self._actors: Dict[Actor, Tuple[int, int]] = {}  # Region each actor was filed under.
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    def __contains__(self, actor: Actor) -> bool:
+        return actor in self._actors
+
+    def add(self, actor: Actor) -> None:
+        if actor in self._actors:
+            return
+        region = actor.x // self.region_size, actor.y // self.region_size
+        self._actors[actor] = region
+        self._regions.setdefault(region, {})[actor] = None
+
+    def discard(self, actor: Actor) -> None:
+        region = self._actors.pop(actor, None)
+        if region is None:
+            return
+        bucket = self._regions[region]
+        del bucket[actor]
+        if not bucket:
+            del self._regions[region]
+
+    def pop_within(
+        self, x: int, y: int, radius: int, predicate: Optional[Callable[[Actor], bool]] = None,
+    ) -> List[Actor]:
+        """
+        Remove and return the living actors within `radius` (Chebyshev distance) of (x, y).
+
+        If `predicate` is given only the actors it accepts are woken. Dead actors found on the way are dropped.
+        """
+        rs = self.region_size
+        found: List[Actor] = []
+        dead: List[Actor] = []
+
+        for rx in range((x - radius) // rs, (x + radius) // rs + 1):
+            for ry in range((y - radius) // rs, (y + radius) // rs + 1):
+                bucket = self._regions.get((rx, ry))
+                if not bucket:
+                    continue
+
+                for actor in bucket:
+                    if not actor.is_alive:
+                        dead.append(actor)
+                    elif max(abs(actor.x - x), abs(actor.y - y)) <= radius and (
+                        predicate is None or predicate(actor)
+                    ):
+                        found.append(actor)
+
+        for actor in dead + found:
+            self.discard(actor)
+
+        return found
@@ -0,0 +1,320 @@
+"""
+Structure-of-arrays storage for actors, for floors with thousands of fighting monsters.
+
+Positions, hit points, power, defense, AI state and alive flags of the stored actors live in
+numpy arrays, one row per actor. `StoredActor` and `StoredFighter` are thin views over a row,
+so the rest of the game uses them like any other actor, while bulk operations such as area
+damage, death sweeps and chase steps work on whole arrays at once.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Dict, List, Optional, Tuple, Type, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from components.fighter import Fighter
+from entity import Actor
+from slotted import slot_names
+
+if TYPE_CHECKING:
+    from components.ai import BaseAI
+    from game_map import GameMap
+
+NO_AI = -1  # AI state of a dead actor.
+
+
+class ActorStore:
+    ARRAYS = ("x", "y", "hp", "power", "defense", "ai_state", "alive")
+
+    def __init__(self, capacity: int = 256):
+        self.size = 0
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.hp = np.zeros(capacity, dtype=np.int32)
+        self.power = np.zeros(capacity, dtype=np.int32)
+        self.defense = np.zeros(capacity, dtype=np.int32)
+        self.ai_state = np.full(capacity, NO_AI, dtype=np.int16)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.actors: List[StoredActor] = []
+        self.ais: List[Optional[BaseAI]] = []
+        self.ai_types: List[Type[BaseAI]] = []  # AI classes, indexed by AI state.
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _allocate(self) -> int:
+        if self.size == len(self.x):
+            for name in self.ARRAYS:
+                array = getattr(self, name)
+                grown = np.resize(array, max(len(array) * 2, 16))
+                grown[len(array):] = NO_AI if name == "ai_state" else 0
+                setattr(self, name, grown)
+
+        self.size += 1
+        self.ais.append(None)
+        return self.size - 1
+
+    def ai_state_of(self, ai: Optional[BaseAI]) -> int:
+        if ai is None:
+            return NO_AI
+        ai_type = type(ai)
+        if ai_type not in self.ai_types:
+            self.ai_types.append(ai_type)
+        return self.ai_types.index(ai_type)
+
+    def spawn(self, template: Actor, gamemap: GameMap, x: int, y: int) -> StoredActor:
+        """Spawn a stored copy of an actor template, like `Entity.spawn` does."""
+        # Copy the components without dragging the whole template along through their parent.
+        memo = {id(template): None}
+        actor = StoredActor(
+            self,
+            x=x,
+            y=y,
+            tile=template.tile,
+            name=template.name,
+            speed=template.speed,
+            ai_cls=type(template.ai),
+            equipment=copy.deepcopy(template.equipment, memo),
+            fighter=Fighter(
+                hp=template.fighter.max_hp,
+                base_defense=template.fighter.base_defense,
+                base_power=template.fighter.base_power,
+            ),
+            inventory=copy.deepcopy(template.inventory, memo),
+            level=copy.deepcopy(template.level, memo),
+        )
+        actor.fighter.hp = template.fighter.hp
+        actor.parent = gamemap
+        gamemap.add_entity(actor)
+        return actor
+
+    def rows_within(self, x: int, y: int, radius: float) -> np.ndarray:
+        """Rows of the living actors within `radius` (euclidean distance) of (x, y)."""
+        n = self.size
+        dist2 = (self.x[:n] - x) ** 2 + (self.y[:n] - y) ** 2
+        return np.flatnonzero(self.alive[:n] & (dist2 <= radius * radius))
+
+    def area_damage(self, x: int, y: int, radius: float, amount: int, source: str = "") -> int:
+        """Damage every living actor within `radius` of (x, y) at once, return how many were hit."""
+        rows = self.rows_within(x, y, radius)
+        self.hp[rows] = np.maximum(self.hp[rows] - amount, 0)
+        for row in rows:
+            self.actors[row].fighter.last_damage_source = source
+        self.sweep_dead()
+        return len(rows)
+
+    def sweep_dead(self) -> int:
+        """Kill the living actors whose hit points dropped to zero through bulk updates."""
+        rows = np.flatnonzero(self.alive[:self.size] & (self.hp[:self.size] <= 0))
+        for row in rows:
+            self.actors[row].fighter.die()
+        return len(rows)
+
+    def chase_step(
+        self,
+        rows: np.ndarray,
+        target_xy: Tuple[int, int],
+        walkable: np.ndarray,
+        blocked: np.ndarray,
+        origin: Tuple[int, int] = (0, 0),
+    ) -> np.ndarray:
+        """
+        Move the given actors one step towards the target where possible, return a mask of those that moved.
+
+        `walkable` and `blocked` may cover only a window of the map, whose corner is at `origin`.
+        """
+        x0, y0 = origin
+        tx, ty = target_xy
+        new_x, new_y, moved = chase_steps(
+            self.x[rows] - x0, self.y[rows] - y0, (tx - x0, ty - y0), walkable, blocked,
+        )
+        self.x[rows] = new_x + x0
+        self.y[rows] = new_y + y0
+        return moved
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        for name in self.ARRAYS:
+            state[name] = state[name][:self.size].copy()
+        return state
+
+
+def chase_steps(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    target_xy: Tuple[int, int],
+    walkable: np.ndarray,
+    blocked: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pick one greedy step towards the target for each (x, y), all at once.
+
+    Each mover tries the straight step first, then the two axis aligned ones. A step is possible
+    if the destination is walkable and neither `blocked` nor claimed by an earlier mover, so
+    conflicts are resolved in input order. Returns the new coordinates and a mask of who moved.
+    """
+    tx, ty = target_xy
+    sx = np.sign(tx - xs)
+    sy = np.sign(ty - ys)
+    candidates = [(sx, sy), (sx, np.zeros_like(sy)), (np.zeros_like(sx), sy)]
+
+    width, height = walkable.shape
+    claimed = blocked.copy()
+    new_x = xs.copy()
+    new_y = ys.copy()
+    moved = np.zeros(len(xs), dtype=bool)
+
+    for dx, dy in candidates:
+        pending = np.flatnonzero(~moved & ((dx != 0) | (dy != 0)))
+        if not len(pending):
+            break
+
+        cx = xs[pending] + dx[pending]
+        cy = ys[pending] + dy[pending]
+        inside = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+        pending, cx, cy = pending[inside], cx[inside], cy[inside]
+
+        free = walkable[cx, cy] & ~claimed[cx, cy]
+        pending, cx, cy = pending[free], cx[free], cy[free]
+
+        # Several movers may want the same cell: the first one in input order gets it.
+        _, first = np.unique(cx * height + cy, return_index=True)
+        first.sort()
+        pending, cx, cy = pending[first], cx[first], cy[first]
+
+        claimed[cx, cy] = True
+        new_x[pending] = cx
+        new_y[pending] = cy
+        moved[pending] = True
+
+    return new_x, new_y, moved
+
+
+def _state_without(obj, stored: Tuple[str, ...]) -> Dict:
+    """
+    Pickle state of a view, without the attributes kept in the store.
+
+    Those are saved with the store itself, and restoring them through the view would depend
+    on the order in which pickle rebuilds the store and the views that reference it.
+    """
+    return {
+        name: getattr(obj, name)
+        for name in slot_names(type(obj))
+        if name not in stored and hasattr(obj, name)
+    }
+
+
+def _restore_state(obj, state: Dict) -> None:
+    for name, value in state.items():
+        setattr(obj, name, value)
+
+
+def _deepcopy_without(obj, stored: Tuple[str, ...], memo: Dict, first: Tuple[str, ...] = ()):
+    """
+    Deep copy of a view, without the attributes kept in the store.
+
+    The attributes in `first` are copied before the others: the generic slot copy goes in slot
+    order, and would set attributes such as `x` through the properties of a copy without a store.
+    """
+    cls = type(obj)
+    clone = cls.__new__(cls)
+    memo[id(obj)] = clone
+    for name in first:
+        setattr(clone, name, copy.deepcopy(getattr(obj, name), memo))
+    for name, value in _state_without(obj, stored + first).items():
+        setattr(clone, name, copy.deepcopy(value, memo))
+    return clone
+
+
+class StoredFighter(Fighter):
+    """A fighter whose hit points, power and defense live in the actor store of its parent."""
+
+    __slots__ = ()
+
+    parent: StoredActor
+
+    @property
+    def _hp(self) -> int:
+        return int(self.parent.store.hp[self.parent.row])
+
+    @_hp.setter
+    def _hp(self, value: int) -> None:
+        self.parent.store.hp[self.parent.row] = value
+
+    def invalidate_stats(self) -> None:
+        super().invalidate_stats()
+        store, row = self.parent.store, self.parent.row
+        store.power[row] = self.power
+        store.defense[row] = self.defense
+
+    def __getstate__(self) -> Dict:
+        return _state_without(self, ("_hp",))
+
+    def __deepcopy__(self, memo: Dict) -> StoredFighter:
+        return _deepcopy_without(self, ("_hp",), memo)
+
+    def __setstate__(self, state: Dict) -> None:
+        _restore_state(self, state)
+
+
+class StoredActor(Actor):
+    """An actor that is a view over one row of an `ActorStore`."""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store: ActorStore, **kwargs):
+        self.store = store
+        self.row = store._allocate()
+        store.actors.append(self)
+        super().__init__(**kwargs)
+
+        fighter = self.fighter
+        hp = Fighter._hp.__get__(fighter)
+        fighter.__class__ = StoredFighter
+        fighter._hp = hp
+        fighter.invalidate_stats()
+
+    @property
+    def x(self) -> int:
+        return int(self.store.x[self.row])
+
+    @x.setter
+    def x(self, value: int) -> None:
+        self.store.x[self.row] = value
+
+    @property
+    def y(self) -> int:
+        return int(self.store.y[self.row])
+
+    @y.setter
+    def y(self, value: int) -> None:
+        self.store.y[self.row] = value
+
+    @property
+    def ai(self) -> Optional[BaseAI]:
+        return self.store.ais[self.row]
+
+    @ai.setter
+    def ai(self, value: Optional[BaseAI]) -> None:
+        self.store.ais[self.row] = value
+        self.store.ai_state[self.row] = self.store.ai_state_of(value)
+        self.store.alive[self.row] = value is not None
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(self.store.alive[self.row])
+
+    def spawn(self, gamemap: GameMap, x: int, y: int) -> StoredActor:
+        """Spawn a copy of this actor, the copy is kept in the same store."""
+        return self.store.spawn(self, gamemap, x, y)
+
+    def __getstate__(self) -> Dict:
+        return _state_without(self, ("x", "y", "ai"))
+
+    def __deepcopy__(self, memo: Dict) -> StoredActor:
+        return _deepcopy_without(self, ("x", "y", "ai"), memo, first=("store", "row"))
+
+    def __setstate__(self, state: Dict) -> None:
+        _restore_state(self, state)
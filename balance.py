@@ -0,0 +1,104 @@
+"""
+Play many seeded games with the headless bot, to see how deep it gets on average.
+
+    python balance.py --games 1000 --workers 8 --out balance.csv
+
+Results are written one row per run, to CSV or to a columnar NPZ depending on the extension:
+
+    pandas.read_csv("balance.csv")
+    pandas.DataFrame(dict(numpy.load("balance.npz")))
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Sequence
+
+import numpy as np  # type: ignore
+
+from headless import run_game
+
+COLUMNS = ("seed", "floor", "turns", "alive", "cause_of_death", "level", "xp", "seconds")
+
+
+def play(seed: int, max_turns: int, map_width: int, map_height: int) -> Dict:
+    """Play one seeded game with the default bot and summarize how it went."""
+    engine, report = run_game(max_turns, seed, map_width=map_width, map_height=map_height)
+    player = engine.player
+    level = player.level
+
+    # Experience spent on previous level ups plus what has been gained since.
+    xp = level.current_xp + sum(
+        level.level_up_base + n * level.level_up_factor for n in range(1, level.current_level)
+    )
+
+    return {
+        "seed": seed,
+        "floor": report["floor"],
+        "turns": report["turns"],
+        "alive": report["alive"],
+        "cause_of_death": "" if player.is_alive else player.fighter.last_damage_source,
+        "level": level.current_level,
+        "xp": xp,
+        "seconds": report["seconds"],
+    }
+
+
+def run_many(
+    seeds: Sequence[int], max_turns: int, workers: int, map_width: int = 40, map_height: int = 40,
+) -> List[Dict]:
+    """Play a game per seed in a pool of worker processes, results are returned in seed order."""
+    job = partial(play, max_turns=max_turns, map_width=map_width, map_height=map_height)
+    # Runs are short, so hand them to the workers in batches to keep the overhead of IPC low.
+    chunksize = max(1, len(seeds) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, seeds, chunksize=chunksize))
+
+
+def write_csv(rows: List[Dict], path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_npz(rows: List[Dict], path: str) -> None:
+    columns = {name: np.array([row[name] for row in rows]) for name in COLUMNS}
+    np.savez_compressed(path, **columns)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--height", type=int, default=40)
+    parser.add_argument("--out", default="balance.csv", help="output file, .csv or .npz")
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    started = time.perf_counter()
+    rows = run_many(seeds, args.max_turns, args.workers, args.width, args.height)
+    elapsed = time.perf_counter() - started
+
+    if args.out.endswith(".npz"):
+        write_npz(rows, args.out)
+    else:
+        write_csv(rows, args.out)
+
+    floors = np.array([row["floor"] for row in rows])
+    print(
+        f"{len(rows)} games in {elapsed:.1f}s with {args.workers} workers, "
+        f"floor reached: mean {floors.mean():.1f}, median {np.median(floors):.0f}, max {floors.max()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Turns of many chasing monsters in one numpy pass.
+
+Actors whose AI sets `batchable` are gathered into coordinate arrays: distances to the player,
+visibility and greedy steps towards the player are computed for all of them at once, then melee
+attacks and moves are resolved in order. Actors whose every greedy step is blocked, and actors that do
+not see the player, take their turn through their AI as usual, which may find a way around the crowd or
+follow their last known path.
+On floors with an actor store, positions are read from and steps written to its arrays directly.
+"""
+from __future__ import annotations
+
+from typing import List, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from actions import MeleeAction
+from actor_store import StoredActor, chase_steps
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+MIN_BATCH_SIZE = 16  # Smaller groups are cheaper to run one by one.
+
+
+def perform_chase_turns(engine: Engine, actors: List[Actor]) -> List[Actor]:
+    """Perform the turns of the given actors that the batch can handle, return those actors."""
+    if len(actors) < MIN_BATCH_SIZE:
+        return []
+
+    game_map = engine.game_map
+    player = engine.player
+    n = len(actors)
+
+    store = game_map.actor_store
+    if store is not None and all(isinstance(actor, StoredActor) for actor in actors):
+        # The positions are already in arrays, and the chasers are moved right there.
+        rows = np.fromiter((actor.row for actor in actors), dtype=np.int64, count=n)
+        xs = store.x[rows].astype(np.int64)
+        ys = store.y[rows].astype(np.int64)
+    else:
+        store = None
+        xs = np.fromiter((actor.x for actor in actors), dtype=np.int64, count=n)
+        ys = np.fromiter((actor.y for actor in actors), dtype=np.int64, count=n)
+    dx = player.x - xs
+    dy = player.y - ys
+    distance = np.maximum(np.abs(dx), np.abs(dy))  # Chebyshev distance.
+    sees_player = game_map.visible[xs, ys]
+
+    attacking = np.flatnonzero(sees_player & (distance <= 1))
+    chasing = np.flatnonzero(sees_player & (distance > 1))
+
+    handled: List[Actor] = []
+
+    for i in attacking:
+        actor = actors[i]
+        if not actor.is_alive:
+            continue  # Killed earlier this turn.
+        actor.ai.idle_turns = 0
+        attack = MeleeAction(actor, int(dx[i]), int(dy[i]))
+        if attack.can_perform():  # The player may already be dead.
+            attack.perform()
+        handled.append(actor)
+
+    if len(chasing):
+        # Every step lands next to a chaser, so only that part of the map is needed.
+        x0 = max(min(xs[chasing].min(), player.x) - 1, 0)
+        y0 = max(min(ys[chasing].min(), player.y) - 1, 0)
+        x1 = min(max(xs[chasing].max(), player.x) + 2, game_map.width)
+        y1 = min(max(ys[chasing].max(), player.y) + 2, game_map.height)
+
+        blocked = np.zeros((x1 - x0, y1 - y0), dtype=bool)
+        for entity in game_map.entities:
+            if store is not None and isinstance(entity, StoredActor):
+                continue  # Marked from the store below.
+            if entity.blocks_movement and x0 <= entity.x < x1 and y0 <= entity.y < y1:
+                blocked[entity.x - x0, entity.y - y0] = True
+        walkable = game_map.walkable[x0:x1, y0:y1]
+
+        if store is not None:
+            n_stored = store.size
+            sx, sy = store.x[:n_stored], store.y[:n_stored]
+            inside = store.alive[:n_stored] & (sx >= x0) & (sx < x1) & (sy >= y0) & (sy < y1)
+            blocked[sx[inside] - x0, sy[inside] - y0] = True
+            moved = store.chase_step(rows[chasing], (player.x, player.y), walkable, blocked, origin=(x0, y0))
+        else:
+            new_x, new_y, moved = chase_steps(
+                xs[chasing] - x0, ys[chasing] - y0, (player.x - x0, player.y - y0), walkable, blocked,
+            )
+            new_x += x0
+            new_y += y0
+
+        for i, actor_index in enumerate(chasing):
+            if not moved[i]:
+                continue  # Left to its AI, which looks for a way around the actors in the way.
+            actor = actors[actor_index]
+            if store is None:
+                actor.move(int(new_x[i] - xs[actor_index]), int(new_y[i] - ys[actor_index]))
+            actor.ai.path = []
+            actor.ai.idle_turns = 0
+            handled.append(actor)
+
+    return handled
@@ -0,0 +1,56 @@
+"""Crowded floors, with the monsters kept as objects or in an actor store."""
+import copy
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import actions
+import entity_factories
+
+SIZE = 200
+CROWDS = [1000, 10000]
+
+
+@pytest.fixture(params=[False, True], ids=["objects", "actor_store"])
+def use_actor_store(request) -> bool:
+    return request.param
+
+
+@pytest.fixture(params=CROWDS, ids=lambda crowd: f"{crowd}_actors")
+def crowd(request) -> int:
+    return request.param
+
+
+def test_chase_turns(benchmark, make_open_floor, spawn, use_actor_store, crowd):
+    engine = make_open_floor(SIZE, use_actor_store=use_actor_store)
+    spawn(engine, crowd)
+    game_map = engine.game_map
+    game_map.visible[:] = True  # Every monster sees the player and closes in.
+    game_map.wake_actors(0, 0, SIZE)
+
+    def turn():
+        engine.handle_enemy_turns()
+        game_map.visible[:] = True
+
+    benchmark(turn)
+    assert engine.player.is_alive
+
+
+def test_fireball(benchmark, make_open_floor, spawn, use_actor_store, crowd):
+    scroll = copy.deepcopy(entity_factories.fireball_scroll)
+    scroll.consumable.radius = 20  # Some 1250 cells, most of them crowded.
+
+    def setup():
+        engine = make_open_floor(SIZE, use_actor_store=use_actor_store)
+        spawn(engine, crowd)
+        engine.game_map.visible[:] = True
+        scroll.parent = engine.player.inventory
+        engine.player.inventory.items.append(scroll)
+        target = engine.player.x + 21, engine.player.y  # Out of the player's reach.
+        return (actions.ItemAction(engine.player, scroll, target),), {}
+
+    def cast(action):
+        scroll.consumable.activate(action)
+
+    benchmark.pedantic(cast, setup=setup, rounds=5)
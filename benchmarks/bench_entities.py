@@ -0,0 +1,25 @@
+"""Spawning entities, as procgen does for every room of a new floor."""
+import copy
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from engine import Engine  # noqa: E402
+import entity_factories  # noqa: E402
+from game_map import GameMap  # noqa: E402
+
+TEMPLATES = [entity_factories.orc, entity_factories.troll, entity_factories.health_potion, entity_factories.dagger]
+
+
+def test_spawn(benchmark, size, count):
+    def new_map():
+        engine = Engine(player=copy.deepcopy(entity_factories.player))
+        engine.game_map = GameMap(engine, size, size)
+        return (engine.game_map,), {}
+
+    def spawn(game_map):
+        for i in range(count):
+            TEMPLATES[i % len(TEMPLATES)].spawn(game_map, i % size, i // size % size)
+
+    benchmark.pedantic(spawn, setup=new_map, rounds=10)
@@ -0,0 +1,22 @@
+"""Field of view, recomputed after every turn of the player."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from engine import FOV_RADIUS, compute_fov  # noqa: E402
+
+
+def test_compute_fov(benchmark, make_open_floor, size):
+    engine = make_open_floor(size)
+    player = engine.player
+    transparent = engine.game_map.transparent
+
+    visible = benchmark(compute_fov, transparent, (player.x, player.y), FOV_RADIUS)
+    assert visible[player.x, player.y]
+
+
+def test_update_fov(benchmark, make_dungeon, size):
+    engine = make_dungeon(size)
+
+    benchmark(engine.update_fov)
+    assert engine.game_map.visible[engine.player.x, engine.player.y]
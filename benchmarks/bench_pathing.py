@@ -0,0 +1,30 @@
+"""Pathfinding of the monsters chasing the player."""
+import numpy as np  # type: ignore
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from components.ai import bfs  # noqa: E402
+import entity_factories  # noqa: E402
+
+DISTANCE = 15  # Steps between the monster and the player.
+
+
+def test_bfs(benchmark, make_open_floor, size):
+    engine = make_open_floor(size)
+    player = engine.player
+    cost = np.array(engine.game_map.walkable, dtype=np.int8)
+    start = (player.x - DISTANCE, player.y - DISTANCE // 2)
+
+    path = benchmark(bfs, cost, start, (player.x, player.y))
+    assert len(path) == DISTANCE + 1
+
+
+def test_get_path_to(benchmark, make_open_floor, spawn, size, count):
+    engine = make_open_floor(size)
+    player = engine.player
+    spawn(engine, min(count, (size - 2) ** 2 // 2))  # A crowd around the player to path around.
+    hunter = entity_factories.troll.spawn(engine.game_map, player.x - DISTANCE, player.y - DISTANCE // 2)
+
+    path = benchmark(hunter.ai.get_path_to, player.x, player.y)
+    assert path[-1] == (player.x, player.y)
@@ -0,0 +1,36 @@
+"""Dungeon generation, when a game starts and on every trip down the stairs."""
+import copy
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from engine import Engine  # noqa: E402
+import entity_factories  # noqa: E402
+from game_map import GameWorld  # noqa: E402
+from procgen import generate_caves, generate_dungeon  # noqa: E402
+
+
+def test_generate_dungeon(benchmark, size):
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    settings = dict(
+        max_rooms=max(size * size // 300, 5),
+        room_min_size=6,
+        room_max_size=10,
+        map_width=size,
+        map_height=size,
+    )
+    engine.game_world = GameWorld(engine=engine, **settings)  # Procgen reads the floor number from it.
+
+    game_map = benchmark(generate_dungeon, engine=engine, **settings)
+    assert game_map.walkable[engine.player.x, engine.player.y]
+
+
+def test_generate_caves(benchmark, size):
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    engine.game_world = GameWorld(
+        engine=engine, max_rooms=0, room_min_size=0, room_max_size=0, map_width=size, map_height=size, generator="caves",
+    )
+
+    game_map = benchmark(generate_caves, map_width=size, map_height=size, engine=engine)
+    assert game_map.walkable[engine.player.x, engine.player.y]
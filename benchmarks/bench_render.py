@@ -0,0 +1,13 @@
+"""Collecting the tiles the map widget draws."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_get_tiles_to_draw(benchmark, make_dungeon, size):
+    engine = make_dungeon(size)
+    game_map = engine.game_map
+    game_map.explored[:] = True  # The worst case: a fully explored floor.
+
+    tiles_to_draw = benchmark(game_map.get_tiles_to_draw)
+    assert len(tiles_to_draw) >= size * size  # Every tile, then the entities.
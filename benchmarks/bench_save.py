@@ -0,0 +1,23 @@
+"""Saving and loading a game, done whenever the app is closed or resumed."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import setup_game  # noqa: E402
+
+
+def test_save_as(benchmark, make_dungeon, tmp_path, size):
+    engine = make_dungeon(size)
+    path = tmp_path / "savegame.sav"
+
+    benchmark(engine.save_as, str(path))
+    assert path.stat().st_size
+
+
+def test_load_game(benchmark, make_dungeon, tmp_path, size):
+    engine = make_dungeon(size)
+    path = tmp_path / "savegame.sav"
+    engine.save_as(str(path))
+
+    loaded = benchmark(setup_game.load_game, str(path))
+    assert (loaded.player.x, loaded.player.y) == (engine.player.x, engine.player.y)
@@ -0,0 +1,20 @@
+"""Turns of the monsters between two turns of the player."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_handle_enemy_turns(benchmark, make_open_floor, spawn, size, count):
+    engine = make_open_floor(size)
+    spawn(engine, min(count, (size - 2) ** 2 // 2))
+    game_map = engine.game_map
+    game_map.visible[:] = True  # Every monster sees the player and closes in.
+    game_map.wake_actors(0, 0, size)
+
+    def turn():
+        engine.handle_enemy_turns()
+        engine.update_fov()
+        game_map.visible[:] = True
+
+    benchmark(turn)
+    assert engine.player.is_alive
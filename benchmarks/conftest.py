@@ -0,0 +1,83 @@
+"""
+Fixtures of the pytest-benchmark suite, the `bench_*.py` modules of this package.
+
+    pytest benchmarks --benchmark-autosave          # Save the results as JSON in .benchmarks/
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Every benchmark starts from the same random seed, so runs on different builds measure the same maps.
+"""
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np  # type: ignore
+import pytest
+
+from engine import Engine
+import entity_factories
+import floors
+import setup_game
+
+MAP_SIZES = [40, 200, 1000]
+ENTITY_COUNTS = [10, 100, 1000]
+
+
+@pytest.fixture(autouse=True)
+def seeded() -> None:
+    floors.reseed()
+
+
+@pytest.fixture(params=MAP_SIZES, ids=lambda size: f"{size}x{size}")
+def size(request) -> int:
+    """Width and height of the map, every benchmark taking it runs for each of MAP_SIZES."""
+    return request.param
+
+
+@pytest.fixture(params=ENTITY_COUNTS, ids=lambda count: f"{count}_entities")
+def count(request) -> int:
+    return request.param
+
+
+def dungeon(size: int) -> Engine:
+    """A new game on a size x size floor, with as many rooms as fit comfortably."""
+    return setup_game.new_game(
+        max_rooms=max(size * size // 300, 5),
+        room_min_size=6,
+        room_max_size=10,
+        map_width=size,
+        map_height=size,
+    )
+
+
+def open_floor(size: int, **kwargs) -> Engine:
+    """A floor without any wall but the border, the player standing in the middle and able to take any hit."""
+    engine = floors.open_floor(size, **kwargs)
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 10**9
+    engine.update_fov()
+    return engine
+
+
+def spawn_around(engine: Engine, count: int, template=entity_factories.orc) -> None:
+    """Spawn `count` copies of a template on the free cells nearest to the player, closest first."""
+    game_map = engine.game_map
+    px, py = engine.player.x, engine.player.y
+    xs, ys = np.nonzero(game_map.walkable)
+    order = np.argsort(np.maximum(abs(xs - px), abs(ys - py)), kind="stable")
+    cells = [(int(xs[i]), int(ys[i])) for i in order if (xs[i], ys[i]) != (px, py)]
+    for x, y in cells[:count]:
+        template.spawn(game_map, x, y)
+
+
+@pytest.fixture
+def make_dungeon() -> Callable[[int], Engine]:
+    return dungeon
+
+
+@pytest.fixture
+def make_open_floor() -> Callable[[int], Engine]:
+    return open_floor
+
+
+@pytest.fixture
+def spawn() -> Callable[..., None]:
+    return spawn_around
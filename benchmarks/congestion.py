@@ -0,0 +1,80 @@
+"""
+Exceptions raised and time per turn on a congested floor.
+
+Monsters crowd a long corridor and half of them are confused, so many of their moves are blocked.
+
+    python -m benchmarks.congestion --monsters 300 --turns 200
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import random
+import time
+
+import numpy as np  # type: ignore
+
+from components.ai import ConfusedEnemy
+from engine import Engine
+import entity_factories
+import exceptions
+from game_map import GameMap
+import tiles
+
+CORRIDOR_LENGTH = 400
+
+
+def congested_floor(monsters: int) -> Engine:
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 10**9
+
+    game_map = GameMap(engine, CORRIDOR_LENGTH + 2, 5)
+    engine.game_map = game_map
+    game_map.set_tiles(np.s_[1:-1, 1:4], tiles.floor)
+    engine.player.place(1, 2, game_map)
+
+    cells = [(x, y) for x in range(3, CORRIDOR_LENGTH + 1) for y in range(1, 4)]
+    for i, (x, y) in enumerate(random.sample(cells, monsters)):
+        monster = entity_factories.orc.spawn(game_map, x, y)
+        if i % 2:
+            monster.ai = ConfusedEnemy(monster, monster.ai, turns_remaining=10**9)
+
+    game_map.visible[:] = True
+    game_map.wake_actors(0, 0, CORRIDOR_LENGTH)
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--monsters", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    engine = congested_floor(args.monsters)
+
+    raised = 0
+    original_init = exceptions.Impossible.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal raised
+        raised += 1
+        original_init(self, *args, **kwargs)
+
+    exceptions.Impossible.__init__ = counting_init
+    try:
+        started = time.perf_counter()
+        for _ in range(args.turns):
+            engine.handle_enemy_turns()
+        elapsed = time.perf_counter() - started
+    finally:
+        exceptions.Impossible.__init__ = original_init
+
+    print(f"{args.monsters} monsters, {args.turns} turns")
+    print(f"  {raised} Impossible exceptions, {raised / args.turns:.1f} per turn")
+    print(f"  {elapsed / args.turns * 1000:.2f}ms per turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memory footprint and spawn/save speed of entities at scale.
+
+    python -m benchmarks.entity_memory --count 100000
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import pickle
+import time
+import tracemalloc
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+
+TEMPLATES = [
+    entity_factories.orc,
+    entity_factories.troll,
+    entity_factories.health_potion,
+    entity_factories.fireball_scroll,
+    entity_factories.dagger,
+    entity_factories.chain_mail,
+]
+
+MAP_SIZE = 1000
+
+
+def new_map() -> GameMap:
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    engine.game_map = GameMap(engine, MAP_SIZE, MAP_SIZE)
+    return engine.game_map
+
+
+def spawn(game_map: GameMap, count: int) -> None:
+    for i in range(count):
+        TEMPLATES[i % len(TEMPLATES)].spawn(game_map, i % MAP_SIZE, i // MAP_SIZE % MAP_SIZE)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    game_map = new_map()
+    tracemalloc.start()
+    spawn(game_map, args.count)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    game_map = new_map()
+    started = time.perf_counter()
+    spawn(game_map, args.count)
+    spawn_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    data = pickle.dumps(game_map.engine)
+    save_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pickle.loads(data)
+    load_seconds = time.perf_counter() - started
+
+    print(f"{args.count} entities")
+    print(f"  memory  {allocated / args.count:8.0f} bytes per entity")
+    print(f"  spawn   {spawn_seconds:8.3f}s")
+    print(f"  save    {save_seconds:8.3f}s, {len(data) / args.count:.0f} bytes per entity")
+    print(f"  load    {load_seconds:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Memory and time per turn on a huge floor kept in a chunked tile file.
+
+The player walks along a long corridor carved through a 10000x10000 map, so only the chunks
+around the corridor are ever touched.
+
+    python -m benchmarks.huge_map --size 10000 --turns 500
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+import tiles
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def huge_floor(size: int, chunk_dir: str) -> Engine:
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    game_map = GameMap(engine, size, size, chunk_dir=chunk_dir)
+    engine.game_map = game_map
+
+    middle = size // 2
+    game_map.set_tiles(np.s_[1:-1, middle - 1:middle + 2], tiles.floor)
+    for x in range(50, size - 50, 500):
+        game_map.set_tiles(np.s_[x:x + 20, middle - 10:middle + 10], tiles.floor)
+
+    engine.player.place(1, middle, game_map)
+    engine.update_fov()
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    before = max_rss_mb()
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        engine = huge_floor(args.size, directory)
+        built = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            engine.player.move(1, 0)
+            engine.update_fov()
+        elapsed = time.perf_counter() - start
+
+        print(f"{args.size}x{args.size} floor, {args.turns} turns")
+        print(f"  built in     {built * 1000:8.1f}ms")
+        print(f"  per turn     {elapsed / args.turns * 1000:8.3f}ms")
+        print(f"  explored     {engine.game_map.explored.count():8d} cells")
+        print(f"  tile file    {os.fstat(engine.game_map.tiles._file.fileno()).st_blocks * 512 / 2**20:8.1f}MB on disk")
+        print(f"  max RSS      {max_rss_mb():8.1f}MB ({max_rss_mb() - before:.1f}MB for the floor)")
+        engine.game_map.close()
+
+
+if __name__ == "__main__":
+    main()
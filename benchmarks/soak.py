@@ -0,0 +1,91 @@
+"""
+Memory growth over a long session: a game that goes down many floors, then many restarted games.
+
+    python -m benchmarks.soak --floors 200 --games 50
+
+A first game warms up the caches, then memory is checked at every floor change and game
+restart like the app does with memory diagnostics on. The run fails if more memory is still
+allocated at the end than after the warm up, by more than `--tolerance` KiB.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from typing import List, Optional
+
+import actions
+from engine import Engine
+import memdiag
+from setup_game import new_game
+
+SETTINGS = dict(max_rooms=5, room_min_size=6, room_max_size=10, map_width=40, map_height=40)
+
+
+def start_game(spill_path: str) -> Engine:
+    engine = new_game(**SETTINGS)
+    engine.message_log.spill_to(spill_path)
+    return engine
+
+
+def descend(engine: Engine) -> None:
+    """Walk straight onto the stairs of the current floor and take them."""
+    player = engine.player
+    player.place(*engine.game_map.downstairs_location)
+    engine.handle_player_action(actions.TakeStairsAction(player))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--floors", type=int, default=200, help="floors descended in one game")
+    parser.add_argument("--games", type=int, default=50, help="games started after that one, a floor each")
+    parser.add_argument("--tolerance", type=float, default=256, help="KiB of growth allowed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="print the report of every checkpoint")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    diagnostics = memdiag.diagnostics
+    if not args.verbose:
+        diagnostics.log = lambda report: None
+
+    with tempfile.TemporaryDirectory() as directory:
+        spill_path = os.path.join(directory, "messages.log")
+
+        engine = start_game(spill_path)
+        descend(engine)
+        engine.message_log.close()
+        del engine
+
+        diagnostics.start()
+        baseline = diagnostics.baseline
+
+        engine = start_game(spill_path)
+        for _ in range(args.floors):
+            descend(engine)
+        engine.message_log.close()
+        del engine
+
+        for game in range(args.games):
+            engine = start_game(spill_path)
+            descend(engine)
+            engine.message_log.close()
+            del engine
+            diagnostics.checkpoint(f"restart {game + 1}")
+
+        end = diagnostics.last
+        growth = diagnostics.growth(baseline)
+        print(f"{args.floors} floors then {args.games} games: {growth / 1024:+.1f} KiB still allocated")
+        print(diagnostics.report(baseline, end))
+        diagnostics.stop()
+
+    if growth > args.tolerance * 1024:
+        print(f"memory grew by more than {args.tolerance} KiB", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Time from a cold start of the app to its first drawn frame.
+
+    python -m benchmarks.startup --runs 5 --screen game
+
+Each run starts a fresh interpreter, which shows the menu (or, with `--screen game`, starts a
+game straight away like the debug app does) and quits as soon as the first frame is drawn.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+STARTED = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def first_frame(screen: str) -> None:
+    """Run the app until its first frame, then print the seconds since this module was loaded."""
+    os.environ["KIVY_NO_ARGS"] = "1"  # Or Kivy takes the options of this script for its own.
+    from kivy.clock import Clock
+
+    import kui
+
+    app_class = kui.DebugDHApp if screen == "game" else kui.DHApp
+    imported = time.perf_counter() - STARTED
+
+    class FirstFrameApp(app_class):
+        def get_application_config(self):
+            # Read the settings of the app under test, not of a "firstframe.ini".
+            name = "debugdh.ini" if screen == "game" else "dh.ini"
+            return super().get_application_config(os.path.join(ROOT, name))
+
+        def on_start(self):
+            Clock.schedule_once(self.report, 0)
+
+        def report(self, dt):
+            print(f"{imported:.4f} {time.perf_counter() - STARTED:.4f}", flush=True)
+            self.stop()
+
+    FirstFrameApp().run()
+
+
+def measure(screen: str) -> List[float]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", "--screen", screen],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return [float(value) for value in output.split()[-2:]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--screen", choices=("menu", "game"), default="menu")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        first_frame(args.screen)
+        return
+
+    runs = [measure(args.screen) for _ in range(args.runs)]
+    imports = [imported for imported, _ in runs]
+    frames = [frame for _, frame in runs]
+
+    print(f"first frame of the {args.screen}, {args.runs} cold starts")
+    print(f"  imports      median {statistics.median(imports) * 1000:7.1f}ms   best {min(imports) * 1000:7.1f}ms")
+    print(f"  first frame  median {statistics.median(frames) * 1000:7.1f}ms   best {min(frames) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Boolean map layers packed 8 cells to a byte.
+
+The visible and explored layers of a map are read cell by cell, combined whole every turn and
+saved with the game. Packing them keeps large maps 8 times smaller in memory and in saves, and
+makes whole-layer operations work on bytes instead of cells. The layers of huge floors keep their
+bytes in a temporary file, whose pages the OS writes out and drops when memory runs short.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class BitLayer:
+    """
+    A (width, height) boolean layer, stored as packed bits in x-major order.
+
+    Cells are read and written with numpy style indexing. Single cells, arrays of coordinates
+    and boolean masks of the layer's shape are accessed in place, raising IndexError for cells
+    out of the layer, other indexes go through an unpacked copy. Combining a layer with a
+    boolean array gives a boolean array.
+    """
+
+    __array_ufunc__ = None  # Make numpy leave `array & layer` to `BitLayer.__rand__`.
+
+    def __init__(self, width: int, height: int, fill_value: bool = False, directory: Optional[str] = None):
+        self.shape = (width, height)
+        self.size = width * height
+        self.directory = directory  # Where a file backed layer keeps its bytes, None for a layer in memory.
+        n_bytes = (self.size + 7) // 8
+        if directory is not None:
+            self.bits = self._file_bits(n_bytes)
+            if fill_value:
+                self.bits[:] = 0xFF
+                self._clear_padding()
+        elif fill_value:
+            self.bits = np.full(n_bytes, 0xFF, dtype=np.uint8)
+            self._clear_padding()
+        else:
+            # Zeroed pages are only committed once written, large mostly empty layers stay cheap.
+            self.bits = np.zeros(n_bytes, dtype=np.uint8)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> BitLayer:
+        layer = cls(*array.shape)
+        layer.assign(array)
+        return layer
+
+    def _file_bits(self, n_bytes: int) -> np.ndarray:
+        # An anonymous file, removed by the OS once the mapping is gone.
+        directory = self.directory if os.path.isdir(self.directory) else None
+        with tempfile.TemporaryFile(prefix="bits-", dir=directory) as f:
+            return np.memmap(f, dtype=np.uint8, mode="w+", shape=(max(n_bytes, 1),))[:n_bytes]
+
+    def _new(self, bits: np.ndarray) -> BitLayer:
+        layer = BitLayer.__new__(BitLayer)
+        layer.shape = self.shape
+        layer.size = self.size
+        layer.directory = None
+        layer.bits = bits
+        return layer
+
+    def _clear_padding(self) -> None:
+        extra = len(self.bits) * 8 - self.size
+        if extra:
+            self.bits[-1] &= 0xFF >> extra
+
+    def _flat_index(self, x: Any, y: Any) -> Any:
+        return x * self.shape[1] + y
+
+    def assign(self, array: np.ndarray) -> None:
+        """Replace the whole layer with a boolean array of the same shape."""
+        assert array.shape == self.shape
+        bits = np.packbits(np.ascontiguousarray(array, dtype=bool).ravel(), bitorder="little")
+        if self.directory is not None:
+            self.bits[:] = bits
+        else:
+            self.bits = bits
+
+    def to_array(self) -> np.ndarray:
+        """The layer as a (width, height) boolean array."""
+        return np.unpackbits(self.bits, count=self.size, bitorder="little").view(bool).reshape(self.shape)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self.to_array()
+        return array if dtype is None else array.astype(dtype)
+
+    def _cell_key(self, key: Any) -> Optional[Tuple[Any, Any]]:
+        """
+        The (x, y) of an index made of two ints or two int arrays, or of a boolean mask, None for any other index.
+
+        Raises IndexError if a cell is out of the layer: unlike numpy, negative coordinates do not wrap around.
+        """
+        if isinstance(key, np.ndarray) and key.dtype == bool:
+            if key.shape != self.shape:
+                raise IndexError(f"boolean index of shape {key.shape} does not match layer of shape {self.shape}")
+            return np.nonzero(key)
+
+        if not (isinstance(key, tuple) and len(key) == 2):
+            return None
+        x, y = key
+        width, height = self.shape
+        if isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer)):
+            if not (0 <= x < width and 0 <= y < height):
+                raise IndexError(f"cell ({x}, {y}) is out of layer of shape {self.shape}")
+            return x, y
+        if isinstance(x, np.ndarray) and isinstance(y, np.ndarray) and x.dtype.kind in "iu" and y.dtype.kind in "iu":
+            if x.size and (x.min() < 0 or x.max() >= width or y.min() < 0 or y.max() >= height):
+                raise IndexError(f"cells out of layer of shape {self.shape}")
+            return x, y
+        return None
+
+    def __getitem__(self, key: Any) -> Any:
+        cell = self._cell_key(key)
+        if cell is None:
+            return self.to_array()[key]
+
+        i = self._flat_index(*cell)
+        bit = (self.bits[i >> 3] >> (i & 7)) & 1
+        return bit.astype(bool) if isinstance(bit, np.ndarray) else bool(bit)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        cell = self._cell_key(key)
+        if cell is None:
+            array = self.to_array()
+            array[key] = value
+            self.assign(array)
+            return
+
+        i = self._flat_index(*cell)
+        mask = np.left_shift(1, i & 7).astype(np.uint8)
+        if isinstance(i, np.ndarray):
+            # One value for every cell, or one for them all. Cells given twice end up set if either value is.
+            value = np.broadcast_to(np.asarray(value, dtype=bool), i.shape)
+            np.bitwise_and.at(self.bits, (i >> 3)[~value], ~mask[~value])
+            np.bitwise_or.at(self.bits, (i >> 3)[value], mask[value])
+        elif value:
+            self.bits[i >> 3] |= mask
+        else:
+            self.bits[i >> 3] &= ~mask
+
+    def _window_index(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        return np.arange(x0, x1)[:, None] * self.shape[1] + np.arange(y0, y1)[None, :]
+
+    def get_window(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """The cells of the rectangle [x0, x1) x [y0, y1) as a boolean array, read without unpacking the layer."""
+        i = self._window_index(x0, y0, x1, y1)
+        return ((self.bits[i >> 3] >> (i & 7)) & 1).astype(bool)
+
+    def set_window(self, x0: int, y0: int, array: np.ndarray) -> None:
+        """Overwrite the rectangle starting at (x0, y0) with a boolean array."""
+        width, height = array.shape
+        i = self._window_index(x0, y0, x0 + width, y0 + height)
+        mask = np.left_shift(1, i & 7).astype(np.uint8)
+        np.bitwise_and.at(self.bits, i >> 3, ~mask)
+        np.bitwise_or.at(self.bits, (i >> 3)[array], mask[array])
+
+    def count(self) -> int:
+        """Number of cells set."""
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def any(self) -> bool:
+        return bool(self.bits.any())
+
+    def nonzero(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Coordinates (xs, ys) of the cells set, found from the bytes that are not zero."""
+        byte_index = np.flatnonzero(self.bits)
+        bits = np.unpackbits(self.bits[byte_index][:, None], axis=1, bitorder="little").astype(bool)
+        flat = (byte_index[:, None] * 8 + np.arange(8))[bits]
+        return np.divmod(flat, self.shape[1])
+
+    def _combine(self, other: Any, op) -> Any:
+        if isinstance(other, BitLayer):
+            return self._new(op(self.bits, other.bits))
+        return op(self.to_array(), np.asarray(other))
+
+    def __and__(self, other: Any) -> Any:
+        return self._combine(other, np.bitwise_and)
+
+    def __or__(self, other: Any) -> Any:
+        return self._combine(other, np.bitwise_or)
+
+    __rand__ = __and__
+    __ror__ = __or__
+
+    def __ior__(self, other: BitLayer) -> BitLayer:
+        self.bits |= other.bits
+        return self
+
+    def __iand__(self, other: BitLayer) -> BitLayer:
+        self.bits &= other.bits
+        return self
+
+    def __invert__(self) -> BitLayer:
+        inverted = self._new(~self.bits)
+        inverted._clear_padding()
+        return inverted
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, BitLayer) and self.shape == other.shape and np.array_equal(self.bits, other.bits)
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        if self.directory is not None:
+            # The file goes away with the layer. Layers of huge floors are mostly empty, save the bytes set.
+            where = np.flatnonzero(self.bits)
+            state["bits"] = (where, np.array(self.bits[where]))
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        state.setdefault("directory", None)
+        self.__dict__.update(state)
+        if self.directory is not None:
+            where, values = state["bits"]
+            self.bits = self._file_bits((self.size + 7) // 8)
+            self.bits[where] = values
+
+    def __repr__(self) -> str:
+        return f"BitLayer({self.shape[0]}, {self.shape[1]}, count={self.count()})"
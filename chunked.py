@@ -0,0 +1,256 @@
+"""
+Map layers stored in chunks of a memory-mapped file, for floors too large to keep in memory.
+
+A `ChunkedGrid` looks like a 2D numpy array to the code that indexes it with single cells,
+arrays of coordinates, boolean masks or rectangular slices, but only the chunks that are
+touched get mapped in. Chunks that were never written read as the fill value without touching
+the file, and the least recently used chunks are released once they take more than `max_bytes`.
+
+The file is an anonymous temporary file, that the OS removes once it is closed, so a grid
+never leaves a file behind. Pickling a grid saves the chunks that were written.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+import mmap
+import os
+import tempfile
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+CHUNK_SIZE = 64  # Cells along each side of a chunk.
+MAX_BYTES = 1 << 20  # Memory taken by the chunks kept mapped in at once.
+
+
+def _bounds(key: slice, size: int) -> Tuple[int, int]:
+    start, stop, step = key.indices(size)
+    if step != 1:
+        raise IndexError("Chunked layers only support slices with a step of 1")
+    return start, max(start, stop)
+
+
+class ChunkedGrid:
+    def __init__(
+        self,
+        shape: Tuple[int, int],
+        dtype: Any = np.uint8,
+        fill_value: Any = 0,
+        max_bytes: int = MAX_BYTES,
+        directory: Optional[str] = None,
+    ):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.fill_value = fill_value
+        self.max_bytes = max_bytes
+        self.directory = directory  # Where the file is created, the system default if None.
+
+        width, height = shape
+        self.n_chunks = (-(-width // CHUNK_SIZE), -(-height // CHUNK_SIZE))
+        # Chunks start on page boundaries, so that a released chunk gives its pages back.
+        chunk_bytes = CHUNK_SIZE * CHUNK_SIZE * self.dtype.itemsize
+        self.chunk_stride = -(-chunk_bytes // mmap.PAGESIZE) * mmap.PAGESIZE
+        self.max_chunks = max(1, max_bytes // self.chunk_stride)
+        self.written = np.zeros(self.n_chunks, dtype=bool)  # Chunks that hold data in the file.
+        self._open()
+
+    def _open(self) -> None:
+        directory = self.directory if self.directory and os.path.isdir(self.directory) else None
+        self._file = tempfile.TemporaryFile(prefix="chunks-", dir=directory)
+        self._file.truncate(self.chunk_stride * self.n_chunks[0] * self.n_chunks[1])  # Sparse on most file systems.
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._chunks: OrderedDict[Tuple[int, int], np.ndarray] = OrderedDict()
+        self._blank = np.full((CHUNK_SIZE, CHUNK_SIZE), self.fill_value, dtype=self.dtype)
+        self._blank.flags.writeable = False
+
+    @property
+    def width(self) -> int:
+        return self.shape[0]
+
+    @property
+    def height(self) -> int:
+        return self.shape[1]
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def _offset(self, cx: int, cy: int) -> int:
+        return (cx * self.n_chunks[1] + cy) * self.chunk_stride
+
+    def chunk(self, cx: int, cy: int, for_writing: bool = False) -> np.ndarray:
+        """The (CHUNK_SIZE, CHUNK_SIZE) array of a chunk, mapped in from the file if needed."""
+        key = (cx, cy)
+        array = self._chunks.get(key)
+        if array is not None:
+            self._chunks.move_to_end(key)
+            return array
+
+        if not self.written[cx, cy]:
+            if not for_writing:
+                return self._blank
+            self.written[cx, cy] = True
+            array = self._map_chunk(cx, cy)
+            array[:] = self.fill_value
+        else:
+            array = self._map_chunk(cx, cy)
+
+        self._chunks[key] = array
+        while len(self._chunks) > self.max_chunks:
+            self._release(*self._chunks.popitem(last=False)[0])
+        return array
+
+    def _map_chunk(self, cx: int, cy: int) -> np.ndarray:
+        count = CHUNK_SIZE * CHUNK_SIZE
+        array = np.frombuffer(self._mmap, dtype=self.dtype, count=count, offset=self._offset(cx, cy))
+        return array.reshape(CHUNK_SIZE, CHUNK_SIZE)
+
+    def _release(self, cx: int, cy: int) -> None:
+        """Write a chunk back to the file and let the OS take its pages back."""
+        offset = self._offset(cx, cy)
+        self._mmap.flush(offset, self.chunk_stride)
+        if hasattr(mmap, "MADV_DONTNEED"):
+            self._mmap.madvise(mmap.MADV_DONTNEED, offset, self.chunk_stride)
+
+    def _chunks_in(self, x0: int, y0: int, x1: int, y1: int) -> Iterator[Tuple[int, int, slice, slice]]:
+        """The chunks overlapping a rectangle, with the part of the rectangle each one covers."""
+        for cx in range(x0 // CHUNK_SIZE, -(-x1 // CHUNK_SIZE)):
+            cx0 = cx * CHUNK_SIZE
+            xs = slice(max(x0, cx0), min(x1, cx0 + CHUNK_SIZE))
+            for cy in range(y0 // CHUNK_SIZE, -(-y1 // CHUNK_SIZE)):
+                cy0 = cy * CHUNK_SIZE
+                ys = slice(max(y0, cy0), min(y1, cy0 + CHUNK_SIZE))
+                yield cx, cy, xs, ys
+
+    def _cells(self, xs: np.ndarray, ys: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Group cell coordinates by chunk: yields chunk coordinates, positions in the input, and local coordinates."""
+        cxs, cys = xs // CHUNK_SIZE, ys // CHUNK_SIZE
+        keys = cxs * self.n_chunks[1] + cys
+        for key in np.unique(keys):
+            where = np.flatnonzero(keys == key)
+            yield int(cxs[where[0]]), int(cys[where[0]]), where, (xs[where] % CHUNK_SIZE, ys[where] % CHUNK_SIZE)
+
+    def _split_key(self, key: Any) -> Tuple[str, Any]:
+        if isinstance(key, np.ndarray) and key.dtype == bool and key.shape == self.shape:
+            return "cells", np.nonzero(key)
+        if not isinstance(key, tuple) or len(key) != 2:
+            raise IndexError("Chunked layers are indexed with (x, y) or a boolean mask")
+        x, y = key
+        if isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer)):
+            return "cell", (int(x), int(y))
+        if isinstance(x, slice) and isinstance(y, slice):
+            return "window", _bounds(x, self.shape[0]) + _bounds(y, self.shape[1])
+        return "cells", np.broadcast_arrays(np.asarray(x), np.asarray(y))
+
+    def __getitem__(self, key: Any) -> Any:
+        kind, index = self._split_key(key)
+
+        if kind == "cell":
+            x, y = index
+            return self.chunk(x // CHUNK_SIZE, y // CHUNK_SIZE)[x % CHUNK_SIZE, y % CHUNK_SIZE]
+
+        if kind == "window":
+            x0, x1, y0, y1 = index
+            window = np.empty((x1 - x0, y1 - y0), dtype=self.dtype)
+            for cx, cy, xs, ys in self._chunks_in(x0, y0, x1, y1):
+                chunk = self.chunk(cx, cy)
+                window[xs.start - x0:xs.stop - x0, ys.start - y0:ys.stop - y0] = chunk[
+                    xs.start % CHUNK_SIZE:xs.start % CHUNK_SIZE + xs.stop - xs.start,
+                    ys.start % CHUNK_SIZE:ys.start % CHUNK_SIZE + ys.stop - ys.start,
+                ]
+            return window
+
+        xs, ys = index
+        values = np.empty(xs.shape, dtype=self.dtype)
+        flat_values = values.reshape(-1)
+        for cx, cy, where, (lx, ly) in self._cells(xs.reshape(-1), ys.reshape(-1)):
+            flat_values[where] = self.chunk(cx, cy)[lx, ly]
+        return values
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        kind, index = self._split_key(key)
+
+        if kind == "cell":
+            x, y = index
+            self.chunk(x // CHUNK_SIZE, y // CHUNK_SIZE, for_writing=True)[x % CHUNK_SIZE, y % CHUNK_SIZE] = value
+            return
+
+        if kind == "window":
+            x0, x1, y0, y1 = index
+            value = np.broadcast_to(np.asarray(value, dtype=self.dtype), (x1 - x0, y1 - y0))
+            for cx, cy, xs, ys in self._chunks_in(x0, y0, x1, y1):
+                chunk = self.chunk(cx, cy, for_writing=True)
+                chunk[
+                    xs.start % CHUNK_SIZE:xs.start % CHUNK_SIZE + xs.stop - xs.start,
+                    ys.start % CHUNK_SIZE:ys.start % CHUNK_SIZE + ys.stop - ys.start,
+                ] = value[xs.start - x0:xs.stop - x0, ys.start - y0:ys.stop - y0]
+            return
+
+        xs, ys = index
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), xs.shape).reshape(-1)
+        for cx, cy, where, (lx, ly) in self._cells(xs.reshape(-1), ys.reshape(-1)):
+            self.chunk(cx, cy, for_writing=True)[lx, ly] = value[where]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """The whole grid as one array, as large as the grid is: meant for small grids and tests."""
+        array = self[:, :]
+        return array if dtype is None else array.astype(dtype)
+
+    def close(self) -> None:
+        """Release the mapping and the file, which the OS then removes. The grid cannot be used afterwards."""
+        if self._mmap is None:
+            return
+        self._chunks.clear()  # The chunk arrays point into the mapping, which cannot close while they live.
+        self._mmap.close()
+        self._file.close()
+        self._mmap = self._file = None
+
+    def __enter__(self) -> ChunkedGrid:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if getattr(self, "_mmap", None) is not None:
+            try:
+                self.close()
+            except BufferError:
+                pass  # A chunk array is still referenced elsewhere, the mapping goes when it does.
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        for name in ("_file", "_mmap", "_chunks", "_blank"):
+            del state[name]
+        # The file goes away with the grid, the save holds the chunks that were written.
+        state["chunks"] = [self._map_chunk(cx, cy).copy() for cx, cy in np.argwhere(self.written)]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        chunks = state.pop("chunks")
+        self.__dict__.update(state)
+        self._open()
+        for (cx, cy), data in zip(np.argwhere(self.written), chunks):
+            self.chunk(int(cx), int(cy), for_writing=True)[:] = data
+
+
+class PaletteLayer:
+    """A layer derived from a chunked grid of palette indices, like `tiles.WALKABLE[grid]` but computed on access."""
+
+    __array_ufunc__ = None  # Keep numpy from materializing the whole layer by accident.
+
+    def __init__(self, grid: ChunkedGrid, palette: np.ndarray):
+        self.grid = grid
+        self.palette = palette
+        self.shape = grid.shape
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.palette[self.grid[key]]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self.palette[np.asarray(self.grid)]
+        return array if dtype is None else array.astype(dtype)
+
+    def __and__(self, other: Any) -> np.ndarray:
+        return np.asarray(self) & np.asarray(other)
+
+    __rand__ = __and__
@@ -11,8 +11,13 @@ from actions import Action, MeleeAction, MovementAction, WaitAction, BumpAction
 if TYPE_CHECKING:
     from entity import Actor
 
+PATH_MARGIN = 20  # Steps a path may stray beyond the straight line distance to its target.
+
 
 class BaseAI(Action):
+    can_sleep = False  # Whether actors with this AI may stay dormant until something wakes them up.
+    batchable = False  # Whether the turns of actors with this AI may be run by `batch_ai`.
+
     def perform(self) -> None:
         raise NotImplementedError()
     
@@ -20,22 +25,44 @@ class BaseAI(Action):
         """Compute and return a path to the target position.
 
         If there is no valid path then returns an empty list.
+
+        The search first looks at the part of the map within PATH_MARGIN steps of the longest path
+        worth taking, so that its cost does not grow with the size of the map. Only targets that
+        cannot be reached that way, by a longer detour or not at all, are searched on the whole map.
         """
+        game_map = self.entity.gamemap
+        x, y = self.entity.x, self.entity.y
+        radius = max(abs(dest_x - x), abs(dest_y - y)) + PATH_MARGIN
+        window = game_map.window(x, y, radius)
+
+        path = self._path_in(window, dest_x, dest_y)
+        if not path and window != (0, 0, game_map.width, game_map.height):
+            path = self._path_in((0, 0, game_map.width, game_map.height), dest_x, dest_y)
+        return path
+
+    def _path_in(self, window: Tuple[int, int, int, int], dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+        """The path to the target through the rectangle (x0, y0, x1, y1) of the map only."""
+        game_map = self.entity.gamemap
+        x, y = self.entity.x, self.entity.y
+        x0, y0, x1, y1 = window
+
         # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles['walkable'], dtype=np.int8)
+        cost = np.array(game_map.walkable[x0:x1, y0:y1], dtype=np.int8)
 
-        for entity in self.entity.gamemap.entities:
+        for entity in game_map.entities:
+            if not (x0 <= entity.x < x1 and y0 <= entity.y < y1):
+                continue
             # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
+            if entity.blocks_movement and cost[entity.x - x0, entity.y - y0]:
                 # Add to the cost of a blocked position.
                 # A lower number means more enemies will crowd behind each other in
                 # hallways.  A higher number means enemies will take longer paths in
                 # order to surround the player.
-                cost[entity.x, entity.y] += 10
+                cost[entity.x - x0, entity.y - y0] += 10
 
         # weights are ignored, first path is returned
-        path = bfs(cost, (self.entity.x, self.entity.y),(dest_x, dest_y))
-        return path[1:]
+        path = bfs(cost, (x - x0, y - y0), (dest_x - x0, dest_y - y0))
+        return [(px + x0, py + y0) for px, py in path[1:]]
 
 
 def neighbours(grid, x, y):
@@ -66,10 +93,47 @@ def bfs(grid, start, end):
     return []
 
 
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+def distance_map(passable: np.ndarray, goals: np.ndarray) -> np.ndarray:
+    """
+    Number of steps from every cell to the nearest goal, moving in 8 directions through passable cells.
+
+    The search grows a whole frontier at a time with array operations instead of visiting cells
+    one by one. Cells that cannot reach any goal are UNREACHABLE.
+    """
+    width, height = passable.shape
+    distance = np.full(passable.shape, UNREACHABLE, dtype=np.int32)
+    distance[goals] = 0
+
+    frontier = goals.copy()
+    unvisited = passable & ~goals
+    step = 0
+    while frontier.any():
+        step += 1
+        padded = np.pad(frontier, 1)
+        grown = np.zeros_like(frontier)
+        for dx in range(3):
+            for dy in range(3):
+                grown |= padded[dx:dx + width, dy:dy + height]
+
+        frontier = grown & unvisited
+        unvisited &= ~frontier
+        distance[frontier] = step
+
+    return distance
+
+
 class HostileEnemy(BaseAI):
+    can_sleep = True
+    batchable = True
+    turns_to_sleep = 20  # Idle turns after which the enemy goes back to sleep.
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
+        self.idle_turns = 0
 
     def perform(self) -> None:
         target = self.engine.player
@@ -78,6 +142,7 @@ class HostileEnemy(BaseAI):
         distance = max(abs(dx), abs(dy))  # Chebyshev distance.
 
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
+            self.idle_turns = 0
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
@@ -85,9 +150,15 @@ class HostileEnemy(BaseAI):
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity, dest_x - self.entity.x, dest_y - self.entity.y,
-            ).perform()
+            action = MovementAction(self.entity, dest_x - self.entity.x, dest_y - self.entity.y)
+            # Someone may be standing in the way, the step is lost then.
+            if action.can_perform():
+                action.perform()
+            return
+
+        self.idle_turns += 1
+        if self.idle_turns >= self.turns_to_sleep:
+            self.entity.gamemap.put_to_sleep(self.entity)
 
         return WaitAction(self.entity).perform()
 
@@ -110,7 +181,7 @@ class ConfusedEnemy(BaseAI):
         # Revert the AI back to the original state if the effect has run its course.
         if self.turns_remaining <= 0:
             self.engine.message_log.add_message(
-                f"The {self.entity.name} is no longer confused."
+                "The {0} is no longer confused.", args=(self.entity.name,)
             )
             self.entity.ai = self.previous_ai
         else:
@@ -132,4 +203,6 @@ class ConfusedEnemy(BaseAI):
 
             # The actor will either try to move or attack in the chosen random direction.
             # Its possible the actor will just bump into the wall, wasting a turn.
-            return BumpAction(self.entity, direction_x, direction_y,).perform()
+            action = BumpAction(self.entity, direction_x, direction_y).resolve()
+            if action.can_perform():
+                action.perform()
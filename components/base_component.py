@@ -2,13 +2,17 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from slotted import Slotted
+
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
 
-class BaseComponent:
+class BaseComponent(Slotted):
+    __slots__ = ("parent",)
+
     parent: Entity  # Owning entity instance.
 
     @property
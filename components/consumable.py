@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import actions
+from actor_store import StoredActor
 import color
 import components.inventory
 from components.base_component import BaseComponent
@@ -13,6 +14,8 @@ if TYPE_CHECKING:
 
 
 class Consumable(BaseComponent):
+    __slots__ = ()
+
     parent: Item
 
     @property
@@ -39,6 +42,8 @@ class Consumable(BaseComponent):
 
 
 class HealingConsumable(Consumable):
+    __slots__ = ("amount",)
+
     def __init__(self, amount: int):
         self.amount = amount
 
@@ -48,8 +53,9 @@ class HealingConsumable(Consumable):
 
         if amount_recovered > 0:
             self.engine.message_log.add_message(
-                f"You consume the {self.parent.name}, and recover {amount_recovered} HP!",
+                "You consume the {0}, and recover {1} HP!",
                 color.health_recovered,
+                args=(self.parent.name, amount_recovered),
             )
             self.consume()
         else:
@@ -57,6 +63,8 @@ class HealingConsumable(Consumable):
 
 
 class LightningDamageConsumable(Consumable):
+    __slots__ = ("damage", "maximum_range")
+
     def __init__(self, damage: int, maximum_range: int):
         self.damage = damage
         self.maximum_range = maximum_range
@@ -70,21 +78,29 @@ class LightningDamageConsumable(Consumable):
             if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
                 distance = consumer.distance(actor.x, actor.y)
 
-                if distance < closest_distance:
+                # Ties are broken by position, so that the outcome does not depend on set order.
+                if distance < closest_distance or (
+                    target is not None
+                    and distance == closest_distance
+                    and (actor.x, actor.y) < (target.x, target.y)
+                ):
                     target = actor
                     closest_distance = distance
 
         if target:
             self.engine.message_log.add_message(
-                f"A lighting bolt strikes the {target.name} with a loud thunder, for {self.damage} damage!"
+                "A lighting bolt strikes the {0} with a loud thunder, for {1} damage!",
+                args=(target.name, self.damage),
             )
-            target.fighter.take_damage(self.damage)
+            target.fighter.take_damage(self.damage, source=self.parent.name)
             self.consume()
         else:
             raise Impossible("No enemy is close enough to strike.")
 
 
 class ConfusionConsumable(Consumable):
+    __slots__ = ("number_of_turns",)
+
     @property
     def selector(self):
         return 'single_cell'
@@ -104,8 +120,9 @@ class ConfusionConsumable(Consumable):
             raise Impossible("You cannot confuse yourself!")
 
         self.engine.message_log.add_message(
-            f"The eyes of the {target.name} look vacant, as it starts to stumble around!",
+            "The eyes of the {0} look vacant, as it starts to stumble around!",
             color.status_effect_applied,
+            args=(target.name,),
         )
         target.ai = components.ai.ConfusedEnemy(
             entity=target, previous_ai=target.ai, turns_remaining=self.number_of_turns,
@@ -114,6 +131,8 @@ class ConfusionConsumable(Consumable):
 
 
 class FireballDamageConsumable(Consumable):
+    __slots__ = ("damage", "radius")
+
     @property
     def selector(self):
         return 'area'
@@ -128,15 +147,30 @@ class FireballDamageConsumable(Consumable):
         if not self.engine.game_map.visible[target_xy]:
             raise Impossible("You cannot target an area that you cannot see.")
 
+        game_map = self.engine.game_map
+        store = game_map.actor_store
         targets_hit = False
-        for actor in self.engine.game_map.actors:
+        for actor in list(game_map.actors):  # Actors killed by the blast leave the map.
+            if store is not None and isinstance(actor, StoredActor):
+                continue  # Damaged all at once below.
             if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
-                )
-                actor.fighter.take_damage(self.damage)
+                self.engulf(actor)
+                actor.fighter.take_damage(self.damage, source=self.parent.name)
                 targets_hit = True
 
+        if store is not None:
+            rows = store.rows_within(*target_xy, self.radius)
+            for row in rows:
+                self.engulf(store.actors[row])
+            store.area_damage(*target_xy, self.radius, self.damage, source=self.parent.name)
+            targets_hit = targets_hit or len(rows) > 0
+
         if not targets_hit:
             raise Impossible("There are no targets in the radius.")
         self.consume()
+
+    def engulf(self, actor: Actor) -> None:
+        self.engine.message_log.add_message(
+            "The {0} is engulfed in a fiery explosion, taking {1} damage!",
+            args=(actor.name, self.damage),
+        )
@@ -15,6 +15,8 @@ class EquipmentType(Enum):
 
 
 class Equipment(BaseComponent):
+    __slots__ = ("weapon", "armor")
+
     parent: Actor
 
     def __init__(self, weapon: Optional[Item] = None, armor: Optional[Item] = None):
@@ -50,12 +52,12 @@ class Equipment(BaseComponent):
 
     def unequip_message(self, item_name: str) -> None:
         self.parent.gamemap.engine.message_log.add_message(
-            f"You remove the {item_name}."
+            "You remove the {0}.", args=(item_name,)
         )
 
     def equip_message(self, item_name: str) -> None:
         self.parent.gamemap.engine.message_log.add_message(
-            f"You equip the {item_name}."
+            "You equip the {0}.", args=(item_name,)
         )
 
     def equip_to_slot(self, slot: str, item: Item, add_message: bool) -> None:
@@ -65,6 +67,7 @@ class Equipment(BaseComponent):
             self.unequip_from_slot(slot, add_message)
 
         setattr(self, slot, item)
+        self.parent.fighter.invalidate_stats()
 
         if add_message:
             self.equip_message(item.name)
@@ -76,6 +79,7 @@ class Equipment(BaseComponent):
             self.unequip_message(current_item.name)
 
         setattr(self, slot, None)
+        self.parent.fighter.invalidate_stats()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
         if (
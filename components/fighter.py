@@ -1,16 +1,33 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 from render_order import RenderOrder
+from slotted import Slotted
 import color
 
 if TYPE_CHECKING:
     from entity import Actor
 
 
+class StatModifier(Slotted):
+    """A temporary bonus (or malus) to the power or defense of a fighter."""
+
+    __slots__ = ("stat", "amount", "turns_remaining")
+
+    def __init__(self, stat: str, amount: int, turns_remaining: int):
+        assert stat in ("power", "defense")
+        self.stat = stat
+        self.amount = amount
+        self.turns_remaining = turns_remaining
+
+
 class Fighter(BaseComponent):
+    __slots__ = (
+        "max_hp", "_hp", "base_defense", "base_power", "last_damage_source", "modifiers", "_stats",
+    )
+
     parent: Actor
     
     def __init__(self, hp: int, base_defense: int, base_power: int):
@@ -18,6 +35,9 @@ class Fighter(BaseComponent):
         self._hp = hp
         self.base_defense = base_defense
         self.base_power = base_power
+        self.last_damage_source = ""  # Name of whatever hurt this fighter last.
+        self.modifiers: List[StatModifier] = []
+        self._stats: Optional[Tuple[int, int]] = None  # Cached (power, defense).
 
     @property
     def hp(self) -> int:
@@ -31,32 +51,75 @@ class Fighter(BaseComponent):
 
     @property
     def defense(self) -> int:
-        return self.base_defense + self.defense_bonus
+        if self._stats is None:
+            self._stats = self._compute_stats()
+        return self._stats[1]
 
     @property
     def power(self) -> int:
-        return self.base_power + self.power_bonus
+        if self._stats is None:
+            self._stats = self._compute_stats()
+        return self._stats[0]
 
     @property
     def defense_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.defense_bonus
-        else:
-            return 0
+        return self.defense - self.base_defense
 
     @property
     def power_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.power_bonus
-        else:
-            return 0
+        return self.power - self.base_power
+
+    def _compute_stats(self) -> Tuple[int, int]:
+        power = self.base_power
+        defense = self.base_defense
+
+        equipment = self.parent.equipment
+        if equipment:
+            power += equipment.power_bonus
+            defense += equipment.defense_bonus
+
+        for modifier in self.modifiers:
+            if modifier.stat == "power":
+                power += modifier.amount
+            else:
+                defense += modifier.amount
+
+        return power, defense
+
+    def invalidate_stats(self) -> None:
+        """
+        Drop the cached power and defense.
+
+        Must be called whenever the base stats, the equipment or the modifiers change.
+        """
+        self._stats = None
+
+    def add_modifier(self, stat: str, amount: int, turns: int) -> None:
+        """Add a temporary bonus to `stat` ("power" or "defense") lasting for the given number of turns."""
+        self.modifiers.append(StatModifier(stat, amount, turns))
+        self.invalidate_stats()
+
+    def tick_modifiers(self) -> None:
+        """Count down the temporary modifiers by one turn, removing the expired ones."""
+        if not self.modifiers:
+            return
+
+        for modifier in self.modifiers:
+            modifier.turns_remaining -= 1
+
+        active = [modifier for modifier in self.modifiers if modifier.turns_remaining > 0]
+        if len(active) != len(self.modifiers):
+            self.modifiers = active
+            self.invalidate_stats()
 
     def die(self) -> None:
         if self.engine.player is self.parent:
             death_message = "You died!"
+            death_message_args = ()
             death_message_color = color.player_die
         else:
-            death_message = f"{self.parent.name} is dead!"
+            death_message = "{0} is dead!"
+            death_message_args = (self.parent.name,)
             death_message_color = color.enemy_die
             self.engine.player.level.add_xp(self.parent.level.xp_given)
 
@@ -66,7 +129,10 @@ class Fighter(BaseComponent):
         self.parent.name = f"remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
 
-        self.engine.message_log.add_message(death_message, death_message_color)
+        if self.engine.player is not self.parent:
+            self.parent.gamemap.bury(self.parent)
+
+        self.engine.message_log.add_message(death_message, death_message_color, args=death_message_args)
 
     def heal(self, amount: int) -> int:
         if self.hp == self.max_hp:
@@ -83,5 +149,6 @@ class Fighter(BaseComponent):
 
         return amount_recovered
 
-    def take_damage(self, amount: int) -> None:
+    def take_damage(self, amount: int, source: str = "") -> None:
+        self.last_damage_source = source
         self.hp -= amount
@@ -9,6 +9,8 @@ if TYPE_CHECKING:
 
 
 class Inventory(BaseComponent):
+    __slots__ = ("capacity", "items")
+
     parent: Actor
 
     def __init__(self, capacity: int):
@@ -22,4 +24,4 @@ class Inventory(BaseComponent):
         self.items.remove(item)
         item.place(self.parent.x, self.parent.y, self.gamemap)
 
-        self.engine.message_log.add_message(f"You dropped the {item.name}.")
+        self.engine.message_log.add_message("You dropped the {0}.", args=(item.name,))
@@ -9,6 +9,8 @@ if TYPE_CHECKING:
 
 
 class Level(BaseComponent):
+    __slots__ = ("current_level", "current_xp", "level_up_base", "level_up_factor", "xp_given")
+
     parent: Actor
 
     def __init__(
@@ -39,11 +41,11 @@ class Level(BaseComponent):
 
         self.current_xp += xp
 
-        self.engine.message_log.add_message(f"You gain {xp} experience points.")
+        self.engine.message_log.add_message("You gain {0} experience points.", args=(xp,))
 
         if self.requires_level_up:
             self.engine.message_log.add_message(
-                f"You advance to level {self.current_level + 1}!"
+                "You advance to level {0}!", args=(self.current_level + 1,)
             )
 
     def increase_level(self) -> None:
@@ -61,6 +63,7 @@ class Level(BaseComponent):
 
     def increase_power(self, amount: int = 1) -> None:
         self.parent.fighter.base_power += amount
+        self.parent.fighter.invalidate_stats()
 
         self.engine.message_log.add_message("You feel stronger!")
 
@@ -68,6 +71,7 @@ class Level(BaseComponent):
 
     def increase_defense(self, amount: int = 1) -> None:
         self.parent.fighter.base_defense += amount
+        self.parent.fighter.invalidate_stats()
 
         self.engine.message_log.add_message("Your movements are getting swifter!")
 
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Decal(NamedTuple):
+    tile: int  # Code point of the character drawn for it.
+    name: str
+    expires: Optional[int]  # Scheduler time at which it fades away, None if it stays for good.
+
+
+class DecalLayer:
+    """
+    Marks drawn over the terrain, like the remains of dead monsters.
+
+    Decals are plain data kept by cell, so they cost nothing to the code that scans the entities
+    of a map. Several may lie on one cell, the last one added is drawn. Decals that fade away are
+    also queued in the order they expire, which is the order they are added in since the time of
+    a map only moves forward.
+    """
+
+    def __init__(self) -> None:
+        self.cells: Dict[Tuple[int, int], List[Decal]] = {}
+        self._expiring: Deque[Tuple[int, int, Decal]] = deque()  # (x, y, decal), soonest first.
+
+    def __len__(self) -> int:
+        return sum(len(decals) for decals in self.cells.values())
+
+    def add(self, x: int, y: int, tile: int, name: str, expires: Optional[int] = None) -> Decal:
+        decal = Decal(tile, name, expires)
+        self.cells.setdefault((x, y), []).append(decal)
+        if expires is not None:
+            self._expiring.append((x, y, decal))
+        return decal
+
+    def at(self, x: int, y: int) -> Optional[Decal]:
+        """The decal drawn on a cell, if any."""
+        decals = self.cells.get((x, y))
+        return decals[-1] if decals else None
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Decal]]:
+        """The (x, y, decal) of every decal, all of those on a cell in the order they were added."""
+        for (x, y), decals in self.cells.items():
+            for decal in decals:
+                yield x, y, decal
+
+    def decay(self, time: int) -> int:
+        """Remove the decals expired at `time`, return how many were removed."""
+        removed = 0
+        while self._expiring and self._expiring[0][2].expires <= time:
+            x, y, decal = self._expiring.popleft()
+            decals = self.cells[x, y]
+            decals.remove(decal)
+            if not decals:
+                del self.cells[x, y]
+            removed += 1
+        return removed
@@ -3,44 +3,127 @@ from __future__ import annotations
 import lzma
 import pickle
 import collections
-from typing import TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 
 import numpy as np
 
+from actions import Action
+import activation
+import batch_ai
+import color
 import exceptions
 from message_log import MessageLog
+import perf
 
 if TYPE_CHECKING:
-    from entity import Entity
+    from entity import Actor
     from game_map import GameMap, GameWorld
 
+FOV_RADIUS = 8
+
 
 class Engine:
     game_map: GameMap
     game_world: GameWorld
 
-    def __init__(self, player: Entity):
+    def __init__(self, player: Actor):
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
 
-    def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
-                    entity.ai.perform()
-                except exceptions.Impossible:
-                    pass  # Ignore impossible action exceptions from AI
+    def handle_player_action(self, action: Action) -> bool:
+        """
+        Perform an action of the player and let the rest of the world respond to it.
+
+        Returns False if the action was impossible, the reason is added to the message log.
+        """
+        try:
+            with perf.phase("action"):
+                action.perform()
+        except exceptions.Impossible as exc:
+            self.message_log.add_message(exc.args[0], color.impossible)
+            return False  # Skip enemy turn on exceptions.
+
+        self.player.fighter.tick_modifiers()
+
+        with perf.phase("ai"):
+            self.handle_enemy_turns(action.cost)
+            self.game_map.decals.decay(self.game_map.scheduler.time)
+        with perf.phase("fov"):
+            self.update_fov()
+
+        return True
+
+    def handle_enemy_turns(self, cost: int = Action.cost) -> None:
+        """Let the other actors act for as long as the player's last action took."""
+        self.game_map.scheduler.advance(self.player.action_delay(cost), self.perform_ai_turns)
+
+    def perform_ai_turns(self, actors: List[Actor]) -> List[Optional[int]]:
+        """
+        Perform the turns of a group of actors due at the same time, return the delays until their next turns.
+
+        Chasing monsters are handled together in one batch when there are enough of them.
+        """
+        batchable = [actor for actor in actors if actor is not self.player and actor.ai.batchable]
+        batched = set(batch_ai.perform_chase_turns(self, batchable))
+
+        delays: List[Optional[int]] = []
+        for actor in actors:
+            if actor in batched:
+                delays.append(self.end_ai_turn(actor))
+            else:
+                delays.append(self.perform_ai_turn(actor))
+        return delays
+
+    def perform_ai_turn(self, actor: Actor) -> Optional[int]:
+        """Perform one turn of an actor's AI and return the delay until its next turn."""
+        if actor is self.player or not actor.is_alive:
+            return None
+
+        try:
+            actor.ai.perform()
+        except exceptions.Impossible:
+            pass  # Ignore impossible action exceptions from AI
+
+        return self.end_ai_turn(actor)
+
+    def end_ai_turn(self, actor: Actor) -> Optional[int]:
+        """Finish the turn of an actor and return the delay until its next turn, if it is still active."""
+        actor.fighter.tick_modifiers()
+
+        if not actor.ai or actor in self.game_map.dormant:
+            return None
+        return actor.action_delay(actor.ai.cost)
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
-        )
+        """
+        Recompute the visible area based on the players point of view.
+
+        Only the cells within FOV_RADIUS of the player can be seen, so the FOV is computed
+        in that window of the map, and the layers are updated in the window only.
+        """
+        game_map = self.game_map
+        x, y = self.player.x, self.player.y
+        x0, y0, x1, y1 = window = game_map.window(x, y, FOV_RADIUS)
+
+        visible = compute_fov(game_map.transparent[x0:x1, y0:y1], (x - x0, y - y0), radius=FOV_RADIUS)
         # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        explored = game_map.explored.get_window(x0, y0, x1, y1)
+        newly_explored = visible & ~explored
+
+        px0, py0, px1, py1 = game_map.fov_window
+        cleared = np.zeros((px1 - px0, py1 - py0), dtype=bool)
+        game_map.visible.set_window(px0, py0, cleared)
+        game_map.newly_explored.set_window(px0, py0, cleared)
+
+        game_map.visible.set_window(x0, y0, visible)
+        game_map.newly_explored.set_window(x0, y0, newly_explored)
+        game_map.explored.set_window(x0, y0, explored | visible)
+        game_map.fov_window = window
+
+        # Dormant actors wake up once the player can see them or comes too close.
+        self.game_map.wake_actors(self.player.x, self.player.y, FOV_RADIUS, visible_only=True)
+        self.game_map.wake_actors(self.player.x, self.player.y, activation.PROXIMITY_RADIUS)
 
     def save_as(self, filename: str) -> None:
         """Save this Engine instance as a compressed file."""
@@ -3,6 +3,8 @@ from __future__ import annotations
 import copy
 from typing import Optional, Type, TypeVar, TYPE_CHECKING, Union
 from render_order import RenderOrder
+from scheduler import NORMAL_SPEED
+from slotted import Slotted
 
 if TYPE_CHECKING:
     from game_map import GameMap
@@ -17,11 +19,13 @@ if TYPE_CHECKING:
 T = TypeVar("T", bound="Entity")
 
 
-class Entity:
+class Entity(Slotted):
     """
     A generic object to represent players, enemies, items, etc.
     """
 
+    __slots__ = ("x", "y", "tile", "name", "blocks_movement", "render_order", "parent")
+
     parent: Union[GameMap, Inventory]
 
     def __init__(
@@ -44,7 +48,7 @@ class Entity:
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
@@ -60,19 +64,25 @@ class Entity:
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """Place this entity at a new location. Handles moving across GameMaps."""
-        self.x = x
-        self.y = y
         if gamemap:
             if hasattr(self, "parent"):  # Possibly uninitialized.
                 if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+                    # Removed from where it was, GameMap files items by their position.
+                    self.gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        elif hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.move_entity(self, x, y)
+        else:
+            self.x = x
+            self.y = y
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -82,6 +92,8 @@ class Entity:
 
 
 class Actor(Entity):
+    __slots__ = ("speed", "ai", "equipment", "fighter", "inventory", "level")
+
     def __init__(
             self,
             *, # Enforce the use of keywords, so that parameter order doesn't matter.
@@ -89,6 +101,7 @@ class Actor(Entity):
             y: int = 0,
             tile: int = ord('!'),
             name: str = "<Unnamed>",
+            speed: int = NORMAL_SPEED,
             ai_cls: Type[BaseAI],
             equipment: Equipment,
             fighter: Fighter,
@@ -103,6 +116,8 @@ class Actor(Entity):
             render_order=RenderOrder.ACTOR
         )
 
+        self.speed = speed
+
         self.ai: Optional[BaseAI] = ai_cls(self)
 
         self.equipment: Equipment = equipment
@@ -122,8 +137,19 @@ class Actor(Entity):
         """Returns True as long as this actor can perform actions."""
         return bool(self.ai)
 
+    def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
+        if gamemap.actor_store is not None:
+            return gamemap.actor_store.spawn(self, gamemap, x, y)
+        return super().spawn(gamemap, x, y)
+
+    def action_delay(self, cost: int) -> int:
+        """Return the time units an action of the given cost takes this actor."""
+        return cost * NORMAL_SPEED // self.speed
+
 
 class Item(Entity):
+    __slots__ = ("consumable", "equippable")
+
     def __init__(
         self,
         *, # Enforce the use of keywords, so that parameter order doesn't matter.
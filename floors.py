@@ -0,0 +1,38 @@
+"""
+Floors built by hand for the tests and the benchmarks, from a known random seed.
+"""
+from __future__ import annotations
+
+import copy
+import random
+from typing import Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+import tiles
+
+SEED = 0
+
+
+def reseed() -> None:
+    """Start from the same random state, so that every run builds the same floors."""
+    random.seed(SEED)
+
+
+def open_floor(
+    width: int, height: Optional[int] = None, player_at: Optional[Tuple[int, int]] = None, **kwargs
+) -> Engine:
+    """A floor without any wall but the border, the player standing at `player_at`, in the middle if None."""
+    if height is None:
+        height = width
+    x, y = player_at or (width // 2, height // 2)
+
+    engine = Engine(player=copy.deepcopy(entity_factories.player))
+    game_map = GameMap(engine, width, height, **kwargs)
+    engine.game_map = game_map
+    game_map.set_tiles(np.s_[1:-1, 1:-1], tiles.floor)
+    engine.player.place(x, y, game_map)
+    return engine
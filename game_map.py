@@ -1,9 +1,17 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
+from activation import DormantIndex
+from bitlayer import BitLayer
+from chunked import ChunkedGrid, PaletteLayer
+from decals import DecalLayer
+from actor_store import ActorStore, StoredActor
 from entity import Actor, Item
+import memdiag
+import perf
+from scheduler import TurnScheduler
 import tiles
 
 if TYPE_CHECKING:
@@ -17,22 +25,158 @@ class GameMap:
         engine: Engine,
         width: int,
         height: int,
-        entities: Iterable[Entity] = ()
+        entities: Iterable[Entity] = (),
+        use_actor_store: bool = False,
+        chunk_dir: Optional[str] = None,
+        corpse_decay: Optional[int] = None,
     ):
         self.engine = engine
         self.width, self.height = width, height
         self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value=tiles.wall, order="F")
+        # The items lying on each cell, the one on top last. Kept up to date by `add_entity` and `remove_entity`.
+        self.item_stacks: Dict[Tuple[int, int], List[Item]] = {}
+        for entity in self.entities:
+            if isinstance(entity, Item):
+                self.item_stacks.setdefault((entity.x, entity.y), []).append(entity)
+        self.scheduler = TurnScheduler(self)
+        self.dormant = DormantIndex()  # Sleeping actors, kept off the schedule until woken.
+        # Actors spawned on mass-combat floors keep their state in numpy arrays.
+        self.actor_store: Optional[ActorStore] = ActorStore() if use_actor_store else None
+        # Palette indices. Huge floors keep them, and their visible and explored layers, in temporary
+        # files in `chunk_dir`, touched only where the game looks.
+        self.tiles: Any
+        if chunk_dir:
+            self.tiles = ChunkedGrid((width, height), np.uint8, fill_value=tiles.wall, directory=chunk_dir)
+        else:
+            self.tiles = np.full((width, height), fill_value=tiles.wall, dtype=np.uint8, order="F")
+        self._walkable: Any = None
+        self._transparent: Any = None
+
+        self.visible = BitLayer(width, height, directory=chunk_dir)  # Tiles the player can currently see
+        self.explored = BitLayer(width, height, directory=chunk_dir)  # Tiles the player has seen before
+        # Tiles the player saw for the first time this turn
+        self.newly_explored = BitLayer(width, height, directory=chunk_dir)
+        self.fov_window = (0, 0, 0, 0)  # The rectangle (x0, y0, x1, y1) the last FOV was computed in.
 
-        self.visible = np.full((width, height), fill_value=False, order="F")  # Tiles the player can currently see
-        self.explored = np.full((width, height), fill_value=False, order="F")  # Tiles the player has seen before
+        # Remains of the dead, drawn with the terrain. They rot away after `corpse_decay` time units, if set.
+        self.decals = DecalLayer()
+        self.corpse_decay = corpse_decay
 
         self.downstairs_location = (0, 0)
 
+    def close(self) -> None:
+        """Release the files of a chunked floor once the game leaves it. Other floors have none."""
+        if isinstance(self.tiles, ChunkedGrid):
+            self.tiles.close()
+
     @property
     def gamemap(self) -> GameMap:
         return self
 
+    def _derive(self, palette: np.ndarray) -> Any:
+        if isinstance(self.tiles, ChunkedGrid):
+            return PaletteLayer(self.tiles, palette)
+        return palette[self.tiles]
+
+    @property
+    def walkable(self) -> np.ndarray:
+        """Boolean layer of the walkable tiles, cached until the tiles change."""
+        if self._walkable is None:
+            self._walkable = self._derive(tiles.WALKABLE)
+        return self._walkable
+
+    @property
+    def transparent(self) -> np.ndarray:
+        """Boolean layer of the tiles that don't block FOV, cached until the tiles change."""
+        if self._transparent is None:
+            self._transparent = self._derive(tiles.TRANSPARENT)
+        return self._transparent
+
+    def window(self, x: int, y: int, radius: int) -> Tuple[int, int, int, int]:
+        """The rectangle (x0, y0, x1, y1) of the cells within `radius` of (x, y), clipped to the map."""
+        return (
+            max(x - radius, 0),
+            max(y - radius, 0),
+            min(x + radius + 1, self.width),
+            min(y + radius + 1, self.height),
+        )
+
+    def set_tiles(self, where: Any, tile: np.uint8) -> None:
+        """Set the tiles at `where`, any numpy index of `tiles`, to a tile type."""
+        self.tiles[where] = tile
+        self.invalidate_tiles()
+
+    def invalidate_tiles(self) -> None:
+        """Forget the layers derived from `tiles`, must be called after changing `tiles` directly."""
+        self._walkable = None
+        self._transparent = None
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state["_walkable"] = state["_transparent"] = None
+        return state
+
+    def add_entity(self, entity: Entity) -> None:
+        """
+        Add an entity to this map.
+
+        Actors other than the player start dormant if their AI can sleep, otherwise they are scheduled right away.
+        """
+        self.entities.add(entity)
+        if isinstance(entity, Item):
+            self.item_stacks.setdefault((entity.x, entity.y), []).append(entity)
+        elif isinstance(entity, Actor) and entity is not self.engine.player:
+            if entity.ai and entity.ai.can_sleep:
+                self.dormant.add(entity)
+            else:
+                self.scheduler.schedule(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        self.entities.remove(entity)
+        if isinstance(entity, Item):
+            self._unstack(entity)
+        elif isinstance(entity, Actor):
+            self.scheduler.unschedule(entity)
+            self.dormant.discard(entity)
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        """Move an entity of this map to (x, y). Items go on top of the stack there."""
+        if isinstance(entity, Item):
+            self._unstack(entity)
+            self.item_stacks.setdefault((x, y), []).append(entity)
+        entity.x = x
+        entity.y = y
+
+    def _unstack(self, item: Item) -> None:
+        stack = self.item_stacks[item.x, item.y]
+        stack.remove(item)
+        if not stack:
+            del self.item_stacks[item.x, item.y]
+
+    def bury(self, actor: Actor) -> None:
+        """Replace a dead actor by a decal of its remains, so that it no longer weighs on entity scans."""
+        self.remove_entity(actor)
+        expires = None if self.corpse_decay is None else self.scheduler.time + self.corpse_decay
+        self.decals.add(actor.x, actor.y, actor.tile, actor.name, expires)
+
+    def put_to_sleep(self, actor: Actor) -> None:
+        """Take an actor off the schedule until something wakes it up."""
+        self.scheduler.unschedule(actor)
+        self.dormant.add(actor)
+
+    def wake_actors(self, x: int, y: int, radius: int, visible_only: bool = False) -> int:
+        """
+        Schedule the dormant actors within `radius` of (x, y), return how many were woken.
+
+        If `visible_only` is True only the actors standing on visible tiles are woken.
+        """
+        predicate = (lambda actor: self.visible[actor.x, actor.y]) if visible_only else None
+        woken = self.dormant.pop_within(x, y, radius, predicate)
+        for actor in woken:
+            actor.ai.idle_turns = 0  # Or an actor that fell asleep idle goes straight back to sleep.
+            self.scheduler.schedule(actor)
+        return len(woken)
+
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over this maps living actors."""
@@ -44,7 +188,13 @@ class GameMap:
 
     @property
     def items(self) -> Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity, Item))
+        for stack in self.item_stacks.values():
+            yield from stack
+
+    def top_item_at(self, x: int, y: int) -> Optional[Item]:
+        """The item on top of the pile at (x, y), the one picked up first and drawn, if any."""
+        stack = self.item_stacks.get((x, y))
+        return stack[-1] if stack else None
 
     def get_blocking_entity_at_location(self, location_x: int, location_y: int) -> Optional[Entity]:
         for entity in self.entities:
@@ -54,6 +204,24 @@ class GameMap:
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
+        store = self.actor_store
+        if store is not None:
+            # Look the stored actors up in their arrays, and only the few others one by one.
+            n = store.size
+            rows = np.flatnonzero(store.alive[:n] & (store.x[:n] == x) & (store.y[:n] == y))
+            if len(rows):
+                return store.actors[rows[0]]
+            for entity in self.entities:
+                if (
+                    not isinstance(entity, StoredActor)
+                    and isinstance(entity, Actor)
+                    and entity.x == x
+                    and entity.y == y
+                    and entity.is_alive
+                ):
+                    return entity
+            return None
+
         for actor in self.actors:
             if actor.x == x and actor.y == y:
                 return actor
@@ -64,21 +232,34 @@ class GameMap:
         return 0 <= x < self.width and 0 <= y < self.height
 
     def get_tiles_to_draw(self):
-        tiles = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if self.explored[x, y]:
-                    tiles.append((x, y, chr(self.tiles[x, y]['tile']), self.visible[x, y]))
+        xs, ys = self.explored.nonzero()
+        glyphs = tiles.GLYPH[self.tiles[xs, ys]]
+        visible = self.visible[xs, ys]
 
+        # Decals replace the glyph of their cell. Explored cells come in flat index order, so they are found by bisection.
+        if self.decals.cells:
+            flat = xs * self.height + ys
+            for (x, y), decals in self.decals.cells.items():
+                i = np.searchsorted(flat, x * self.height + y)
+                if i < len(flat) and flat[i] == x * self.height + y:
+                    glyphs[i] = decals[-1].tile
+
+        tiles_to_draw = []
+        for x, y, glyph, is_visible in zip(xs.tolist(), ys.tolist(), glyphs.tolist(), visible.tolist()):
+            tiles_to_draw.append((x, y, chr(glyph), is_visible))
+
+        # Only the top item of each pile is drawn.
         entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
+            [entity for entity in self.entities if not isinstance(entity, Item)]
+            + [stack[-1] for stack in self.item_stacks.values()],
+            key=lambda x: x.render_order.value,
         )
 
         for e in entities_sorted_for_rendering:
             if self.visible[e.x, e.y]:
-                tiles.append((e.x, e.y, chr(e.tile), True))
+                tiles_to_draw.append((e.x, e.y, chr(e.tile), True))
 
-        return tiles
+        return tiles_to_draw
 
 
 class GameWorld:
@@ -95,9 +276,17 @@ class GameWorld:
         max_rooms: int,
         room_min_size: int,
         room_max_size: int,
-        current_floor: int = 0
+        current_floor: int = 0,
+        generator: str = "rooms",
+        use_actor_store: bool = False,
+        corpse_decay: Optional[int] = None,
+        chunk_dir: Optional[str] = None,
     ):
         self.engine = engine
+        self.generator = generator  # "rooms" for rooms joined by tunnels, "caves" for cellular automata caves.
+        self.use_actor_store = use_actor_store  # Keep the monsters of each floor in an `ActorStore`.
+        self.corpse_decay = corpse_decay  # Time units before the remains of the dead fade, None to keep them.
+        self.chunk_dir = chunk_dir  # Where huge floors keep their layers in temporary files, None for memory.
 
         self.map_width = map_width
         self.map_height = map_height
@@ -110,15 +299,33 @@ class GameWorld:
         self.current_floor = current_floor
 
     def generate_floor(self) -> None:
-        from procgen import generate_dungeon
+        from procgen import generate_caves, generate_dungeon
 
         self.current_floor += 1
+        previous = getattr(self.engine, "game_map", None)
 
-        self.engine.game_map = generate_dungeon(
-            max_rooms=self.max_rooms,
-            room_min_size=self.room_min_size,
-            room_max_size=self.room_max_size,
-            map_width=self.map_width,
-            map_height=self.map_height,
-            engine=self.engine,
-        )
+        with perf.phase("procgen"):
+            if self.generator == "caves":
+                self.engine.game_map = generate_caves(
+                    map_width=self.map_width,
+                    map_height=self.map_height,
+                    engine=self.engine,
+                    use_actor_store=self.use_actor_store,
+                    corpse_decay=self.corpse_decay,
+                    chunk_dir=self.chunk_dir,
+                )
+            else:
+                self.engine.game_map = generate_dungeon(
+                    max_rooms=self.max_rooms,
+                    room_min_size=self.room_min_size,
+                    room_max_size=self.room_max_size,
+                    map_width=self.map_width,
+                    map_height=self.map_height,
+                    engine=self.engine,
+                    use_actor_store=self.use_actor_store,
+                    corpse_decay=self.corpse_decay,
+                    chunk_dir=self.chunk_dir,
+                )
+        if previous is not None:
+            previous.close()
+        memdiag.checkpoint(f"floor {self.current_floor}")
@@ -0,0 +1,787 @@
+"""The game screen, its widgets and popups. Imported when the first game starts, not before the menu shows."""
+import collections
+import functools
+from typing import Callable, Optional
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage
+from kivy.uix.image import Image as UxImage
+from kivy.graphics import Rectangle, Color
+from kivy.uix.widget import Widget
+from kivy.uix.popup import Popup
+from kivy.uix.modalview import ModalView as ModalView
+from kivy.core.window import Window
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.label import Label
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.logger import Logger
+
+from engine import Engine
+import entity
+import actions
+from replay import SessionRecorder
+import color
+import perf
+import travel
+
+MAPPER_1BIT = {
+    '@': (28, 0), # character
+    '+': (11, 2), # wall
+    ' ': (2, 0), # floor
+    '>': (7, 12), # ladder
+    'T': (30, 6), # troll
+    'o': (29, 2), # orc
+    '*': (15, 10), # fireball scroll
+    '%': (12, 5), # lightning scroll
+    '?': (37, 13), # confusion scroll
+    ':': (34, 13), # health potion
+    '/': (34, 6), # weapon
+    '[': (34, 1), # armor
+    'x': (0, 15), # corpse
+    'X': (25, 14), # selection mark
+}
+
+class Tileset:
+    def __init__(self, tile_image_path, mapper, tile_width=16, tile_height=16, row_border=0, col_border=0):
+        self.mapper = mapper
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.row_border = row_border
+        self.col_border = col_border
+
+        # The sheet is decoded once, and only the tiles named by the mapper get a region.
+        texture = CoreImage(tile_image_path).texture
+        self.images = {}
+        for iid, (x, y) in mapper.items():
+            # invert y for OpenGL coordinates
+            tx = x*self.tile_width + x*self.col_border
+            ty = texture.height - y*self.tile_height - y*self.row_border - self.tile_height
+            self.images[iid] = texture.get_region(tx, ty, tile_width, tile_height)
+
+    def get_image(self, iid: str):
+        return self.images[iid]
+
+
+@functools.lru_cache(maxsize=None)
+def shared_tileset() -> Tileset:
+    """The tileset of the game, loaded when the first game starts and shared by all later ones."""
+    return Tileset('1bit-pack-kenney.png', MAPPER_1BIT, col_border=1, row_border=1)
+
+
+class DeferredDraw:
+    """
+    Mixin for widgets with a `draw` method: draw requests are coalesced into one draw in the next frame.
+
+    Resizing a window or processing several turns in a frame then costs a single redraw.
+    Draws are timed under `draw_phase` when profiling is on.
+    """
+
+    _draw_trigger = None
+    draw_phase = 'draw'
+
+    def schedule_draw(self, *args):
+        if self._draw_trigger is None:
+            self._draw_trigger = Clock.create_trigger(self._timed_draw)
+        self._draw_trigger()
+
+    def _timed_draw(self, dt):
+        with perf.phase(self.draw_phase):
+            self.draw()
+
+    def on_size(self, *args):
+        self.schedule_draw()
+
+
+class GameWidget(DeferredDraw, Widget):
+    draw_phase = 'draw_map'
+
+    def __init__(self, engine: Engine, tileset: Tileset, scale=1, **kwargs):
+        super().__init__(**kwargs)
+
+        self.engine = engine
+        self.tileset = tileset
+        self.scale = scale
+
+    def draw(self):
+        self.canvas.clear()
+        self.canvas.after.clear()
+
+        tiles = self.engine.game_map.get_tiles_to_draw()
+        wx, wy = self.pos
+        tile_width = self.tileset.tile_width * self.scale
+        tile_height = self.tileset.tile_height * self.scale
+
+        with self.canvas:
+            for x, y, iid, _ in tiles:
+                texture = self.tileset.get_image(iid)
+
+                pos_x = wx + x * tile_width
+                pos_y = wy + y * tile_height
+                size = (tile_width, tile_height)
+
+                Rectangle(texture=texture, pos=(pos_x, pos_y), size=size)
+
+        with self.canvas.after:
+            for x, y, _, visible in tiles:
+                if visible:
+                    continue
+
+                pos_x = wx + x * tile_width
+                pos_y = wy + y * tile_height
+                size = (tile_width, tile_height)
+
+                Color(0, 0, 0, .4)
+                Rectangle(pos=(pos_x, pos_y), size=size)
+
+
+
+RUN_DIRECTIONS = {81: (0, -1), 82: (0, 1), 80: (-1, 0), 79: (1, 0)}  # Arrow key scancodes.
+F3 = 60  # Scancode of the key that shows the performance overlay.
+MAX_QUEUED_KEYS = 4  # Older key presses are dropped, so that held keys do not leave the game lagging behind.
+
+
+class MainGameScreen(BoxLayout):
+    def __init__(self, engine: Engine, recorder: Optional[SessionRecorder] = None, **kwargs):
+        super().__init__(**kwargs)
+
+        self.orientation = 'vertical'
+
+        self.tileset = shared_tileset()
+        self.engine = engine
+        self.recorder = recorder
+
+        config = App.get_running_app().config
+        level_height = config.getint('metrics', 'level_height')
+        bar_height = config.getint('metrics', 'bar_height')
+        gw_height = level_height/(level_height+bar_height)
+        db_height = bar_height/(level_height+bar_height)
+
+        self.game = GameWidget(self.engine, self.tileset, scale=2, size_hint=(1, gw_height))
+        self.add_widget(self.game)
+
+        down_bar = BoxLayout(orientation='horizontal', size_hint=(1, db_height))
+        self.add_widget(down_bar)
+
+        left_panel = BoxLayout(size_hint=(.4, 1), orientation='vertical')
+        down_bar.add_widget(left_panel)
+
+        self.level_number = LevelNumber(engine)
+        left_panel.add_widget(self.level_number)
+        self.health_bar = HealthBar(engine)
+        left_panel.add_widget(self.health_bar)
+
+        self.msg_log = MsgLog(engine, size_hint=(.6, 1))
+        down_bar.add_widget(self.msg_log)
+
+        # Key presses are queued and handled once per frame, see `process_keys`.
+        self.key_queue = collections.deque(maxlen=MAX_QUEUED_KEYS)
+        self.process_keys_trigger = Clock.create_trigger(self.process_keys)
+        self.popup_open = False
+
+        # With profiling on, a turn is everything a key press causes, up to the redraw in the next frame.
+        self.end_turn_trigger = Clock.create_trigger(lambda dt: perf.timers.end_turn())
+        self.perf_overlay: Optional[PerfOverlay] = None
+
+    def on_parent(self, instance, parent):
+        # The window keeps its handlers alive: bind only while shown, or every past game stays in memory.
+        if parent is not None:
+            Window.bind(on_close=self.on_close)
+        else:
+            Window.unbind(on_close=self.on_close)
+            self.key_queue.clear()
+            self.engine.message_log.close()
+
+    def on_keyboard(self, instance, keyboard, keycode, text, modifiers):
+        self.key_queue.append((keycode, text, modifiers))
+        self.process_keys_trigger()
+
+    def process_keys(self, dt):
+        """Handle the queued key presses, the turns they take are drawn together in the next frame."""
+        while self.key_queue and not self.popup_open and self.parent is not None:
+            self.handle_key(*self.key_queue.popleft())
+
+    def handle_key(self, keycode, text, modifiers):
+        if perf.timers.enabled:
+            self.end_turn_trigger()  # Triggered after the draws the key causes, so it runs after them.
+
+        if keycode == F3 and perf.timers.enabled: # performance overlay
+            self.toggle_perf_overlay()
+        elif keycode in RUN_DIRECTIONS and 'shift' in modifiers: # run
+            dx, dy = RUN_DIRECTIONS[keycode]
+            self.run_command(lambda perform: travel.run(self.engine, dx, dy, perform))
+        elif keycode == 81:
+            self.move_player(0, -1)
+        elif keycode == 82:
+            self.move_player(0, 1)
+        elif keycode == 80:
+            self.move_player(-1, 0)
+        elif keycode == 79:
+            self.move_player(1, 0)
+        elif text == 'q':
+            self.save_game()
+            if self.perf_overlay is not None:
+                self.toggle_perf_overlay()
+            self.parent.main_menu()
+        elif text == '.' and 'shift' in modifiers: # descend
+            self.handle_action(actions.TakeStairsAction(self.engine.player))
+        elif text == '.': # wait
+            self.handle_action(actions.WaitAction(self.engine.player))
+        elif text == 'g': # pickup item
+            self.handle_action(actions.PickupAction(self.engine.player))
+        elif text == 'x': # explore
+            self.run_command(lambda perform: travel.auto_explore(self.engine, perform))
+        elif text == 't': # travel
+            p = self.engine.player
+            self.open_popup(TravelPopup(self.engine, self.game, (p.x, p.y)))
+        elif text == 'v': # show message log
+            self.open_popup(MsgLogPopup(self.engine))
+        elif text == 'c': # show character
+            CharScreenPopup(self.engine).open()
+        elif text == 'i': # use item
+            self.open_popup(popup = InventoryActivatePopup(self.engine, self.game))
+        elif text == 'd': # drop item
+            self.open_popup(InventoryDropPopup(self.engine, self.tileset))
+        elif text == '/': # look
+            p = self.engine.player
+            popup = SelectPopup(self.tileset, self.game, (p.x, p.y))
+            self.open_popup(popup)
+
+    def open_popup(self, popup: Popup):
+        # Keys pressed before the popup showed up were not meant for it.
+        self.key_queue.clear()
+        self.popup_open = True
+
+        popup.bind(on_dismiss=self.handle_popup)
+        Window.unbind(on_keyboard=self.on_keyboard)
+        Window.bind(on_keyboard=popup.on_keyboard)
+        popup.open()
+
+    def handle_popup(self, popup):
+        self.popup_open = False
+        Window.unbind(on_keyboard=popup.on_keyboard)
+        Window.bind(on_keyboard=self.on_keyboard)
+        if self.recorder and hasattr(popup, 'level_up_choice'):
+            self.recorder.record_level_up(popup.level_up_choice)
+        if hasattr(popup, 'action'):
+            self.handle_action(popup.action)
+        elif hasattr(popup, 'command'):
+            self.run_command(popup.command)
+        elif hasattr(popup, 'popup'):
+            self.open_popup(popup.popup)
+        elif not self.engine.player.is_alive: # after end game popup
+            self.parent.main_menu()
+
+    def perform_action(self, action: actions.Action) -> bool:
+        """Perform an action of the player without redrawing anything."""
+        if self.recorder:
+            self.recorder.record_action(self.engine, action)
+        return self.engine.handle_player_action(action)
+
+    def handle_action(self, action: actions.Action) -> bool:
+        if not self.perform_action(action):
+            self.msg_log.schedule_draw()
+            return False
+
+        self.end_turns()
+        return True
+
+    def run_command(self, command: Callable[[travel.Perform], int]):
+        """Run a command that takes many turns, then redraw once."""
+        if command(self.perform_action):
+            self.end_turns()
+        else:
+            self.msg_log.schedule_draw()
+
+    def end_turns(self):
+        if not self.engine.player.is_alive:
+            self.open_popup(popup = EndGamePopup())
+        elif self.engine.player.level.requires_level_up:
+            self.open_popup(popup = LevelUpPopup(self.engine))
+
+        self.game.schedule_draw()
+        self.health_bar.schedule_draw()
+        self.msg_log.schedule_draw()
+        self.level_number.schedule_draw()
+
+    def move_player(self, dx, dy):
+        action = actions.BumpAction(self.engine.player, dx, dy)
+        self.handle_action(action)
+
+    def save_game(self):
+        file_name = 'savegame.sav'
+        self.engine.save_as(file_name)
+        Logger.info(f'Game saved to {file_name}')
+
+        if self.recorder:
+            trace_name = 'session.replay.json'
+            self.recorder.save(self.engine, trace_name)
+            Logger.info(f'Session recorded to {trace_name}')
+
+    def toggle_perf_overlay(self):
+        if self.perf_overlay is None:
+            self.perf_overlay = PerfOverlay()
+            Window.add_widget(self.perf_overlay)
+        else:
+            self.perf_overlay.stop()
+            Window.remove_widget(self.perf_overlay)
+            self.perf_overlay = None
+
+    def on_close(self, *args):
+        self.save_game()
+        perf.timers.close_trace()
+        return True
+
+
+class PerfOverlay(Label):
+    """Rolling p50/p95 time per turn of each phase, refreshed twice a second."""
+
+    refresh_interval = .5
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            size_hint=(None, None),
+            halign='left',
+            valign='top',
+            font_name='RobotoMono-Regular',
+            font_size='12sp',
+            color=(1, 1, .4, 1),
+            **kwargs,
+        )
+        self.bind(texture_size=self.place)
+        self.refresh_event = Clock.schedule_interval(self.refresh, self.refresh_interval)
+        self.refresh()
+
+    def place(self, *args):
+        self.size = self.texture_size
+        self.pos = (4, Window.height - self.height - 4)
+
+    def refresh(self, *args):
+        lines = [f'{"phase":<9}{"p50":>8}{"p95":>8}  ({len(perf.timers.recent)} turns)']
+        for name, (p50, p95) in perf.timers.percentiles().items():
+            lines.append(f'{name:<9}{p50 * 1000:7.2f}ms{p95 * 1000:6.2f}ms')
+        self.text = '\n'.join(lines)
+
+    def stop(self):
+        self.refresh_event.cancel()
+
+
+class HealthBar(DeferredDraw, Widget):
+    draw_phase = 'draw_hp'
+
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+
+    def draw(self):
+        self.canvas.clear()
+        with self.canvas:
+            wx, wy = self.pos
+            wsx, wsy = self.size
+
+            current_hp = self.engine.player.fighter.hp
+            max_hp = self.engine.player.fighter.max_hp
+            max_size_x = wsx-20
+            curr_size_x = current_hp/max_hp*max_size_x
+
+            Color(40/256, 40/256, 40/256, 1)
+            Rectangle(pos=self.pos, size=self.size)
+
+            Color(86/255, 105/255, 104/255)
+            Rectangle(pos=(wx+10, wy+10), size=(max_size_x, wsy-20))
+
+            Color(26/255, 107/255, 53/255)
+            Rectangle(pos=(wx+10, wy+10), size=(curr_size_x, wsy-20))
+
+
+def recycle_list(viewclass, row_height: int) -> RecycleView:
+    """A vertical list that only creates widgets for the visible rows, and reuses them when scrolled."""
+    layout = RecycleBoxLayout(
+        orientation='vertical',
+        size_hint_y=None,
+        default_size=(None, row_height),
+        default_size_hint=(1, None),
+    )
+    layout.bind(minimum_height=layout.setter('height'))
+
+    view = RecycleView()
+    view.add_widget(layout)
+    view.viewclass = viewclass
+    return view
+
+
+class MsgLog(DeferredDraw, BoxLayout):
+    draw_phase = 'draw_log'
+    lines = 3
+
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'vertical'
+        self.engine = engine
+
+        # The labels are reused, a label only renders its texture again when its text changes.
+        self.labels = [Label() for _ in range(self.lines)]
+        for label in self.labels:
+            self.add_widget(label)
+
+    def draw(self):
+        self.canvas.before.clear()
+        with self.canvas.before:
+            Color(40/256, 40/256, 40/256, 1)
+            Rectangle(pos=self.pos, size=self.size)
+
+        messages = self.engine.message_log.latest(self.lines)
+        for i, label in enumerate(self.labels):
+            if i < len(messages):
+                label.text = messages[i].full_text
+                label.color = messages[i].color
+            else:
+                label.text = ''
+
+
+class LevelNumber(DeferredDraw, BoxLayout):
+    draw_phase = 'draw_lvl'
+
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+
+        self.engine = engine
+
+        self.label = Label(text='level')
+        self.add_widget(self.label)
+
+    def draw(self):
+        self.canvas.before.clear()
+        with self.canvas.before:
+            Color(40/256, 40/256, 40/256, 1)
+            Rectangle(pos=self.pos, size=self.size)
+
+        floor = self.engine.game_world.current_floor
+        self.label.text = f'Level {self.engine.game_world.current_floor}'
+
+
+class EndGamePopup(ModalView):
+    def on_size(self, *args):
+        self.canvas.clear()
+
+    def on_keyboard(self, instance, keyboard, keycode, text, modifiers):
+        pass
+
+
+class SelectPopup(DeferredDraw, ModalView):
+    def __init__(
+            self,
+            game: GameWidget,
+            start_xy: tuple[int, int],
+            **kwargs):
+        super().__init__(**kwargs)
+
+        self.game = game
+
+        sx, sy = start_xy
+        self.sel_x = sx
+        self.sel_y = sy
+
+    def draw(self):
+        self.canvas.clear()
+
+        with self.canvas:
+            x = self.sel_x
+            y = self.sel_y
+
+            texture = self.game.tileset.get_image('X')
+
+            wx, wy = self.game.pos
+            tile_width = self.game.tileset.tile_width * self.game.scale
+            tile_height = self.game.tileset.tile_height * self.game.scale
+            pos_x = wx + x * tile_width
+            pos_y = wy + y * tile_height
+            size = (tile_width, tile_height)
+
+            Rectangle(texture=texture, pos=(pos_x, pos_y), size=size)
+
+    def on_keyboard(self, instance, keyboard, keycode, text, modifiers):
+        if keycode == 81:
+            self.sel_y -= 1
+            self.schedule_draw()
+        elif keycode == 82:
+            self.sel_y += 1
+            self.schedule_draw()
+        elif keycode == 80:
+            self.sel_x -= 1
+            self.schedule_draw()
+        elif keycode == 79:
+            self.sel_x += 1
+            self.schedule_draw()
+        elif keycode == 40 or keycode == 44: # enter (40) or space (44)
+            self.target_selected = True
+            self.on_target_selected()
+            self.dismiss()
+
+    def on_target_selected(self):
+        pass
+
+
+class SelectCellPopup(SelectPopup):
+    def __init__(
+            self,
+            game: GameWidget,
+            start_xy: tuple[int, int],
+            action_factory: Callable[[tuple[int, int]], actions.Action],
+            **kwargs):
+        super().__init__(game, start_xy, **kwargs)
+
+        self.action_factory = action_factory
+
+    def on_target_selected(self):
+        self.action = self.action_factory((self.sel_x, self.sel_y))
+
+
+class TravelPopup(SelectPopup):
+    def __init__(self, engine: Engine, game: GameWidget, start_xy: tuple[int, int], **kwargs):
+        super().__init__(game, start_xy, **kwargs)
+        self.engine = engine
+
+    def on_target_selected(self):
+        x, y = self.sel_x, self.sel_y
+        self.command = lambda perform: travel.travel(self.engine, x, y, perform)
+
+
+class SelectAreaPopup(SelectCellPopup):
+    def __init__(
+            self,
+            game: GameWidget,
+            start_xy: int,
+            action_factory: Callable[[tuple[int, int]], actions.Action],
+            radius: int,
+            **kwargs):
+        super().__init__(game, start_xy, action_factory, **kwargs)
+
+        self.radius = radius
+
+    def draw(self):
+        self.canvas.clear()
+
+        with self.canvas:
+            x = self.sel_x
+            y = self.sel_y
+            r = self.radius
+
+            wx, wy = self.game.pos
+            tile_width = self.game.tileset.tile_width * self.game.scale
+            tile_height = self.game.tileset.tile_height * self.game.scale
+
+            pos_x = wx + (x-(r-1)) * tile_width
+            pos_y = wy + (y-(r-1)) * tile_height
+            size = (tile_width * ((r-1) * 2 + 1), tile_height * ((r-1) * 2 + 1))
+
+            Color(1, 0, 0, .25)
+            Rectangle(pos=(pos_x, pos_y), size=size)
+
+            for dx, dy in [[-r, 0], [r, 0], [0, -r], [0, r]]:
+                pos_x = wx + (x+dx) * tile_width
+                pos_y = wy + (y+dy) * tile_height
+                size = (tile_width, tile_height)
+                Rectangle(pos=(pos_x, pos_y), size=size)
+
+
+class MsgLogPopup(Popup):
+    """Scrollable message history, older pages are loaded when the view is scrolled to the top."""
+
+    row_height = 30
+
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.title = 'Messages'
+        self.engine = engine
+
+        self.pages = 1
+        self.view = recycle_list(Label, self.row_height)
+        self.view.data = self.rows(0)
+        self.view.scroll_y = 0
+        self.view.bind(scroll_y=self.on_scroll)
+        self.add_widget(self.view)
+
+    def rows(self, page):
+        return [{'text': msg.full_text, 'color': msg.color} for msg in self.engine.message_log.page(page)]
+
+    def has_older_page(self):
+        return self.pages < self.engine.message_log.page_count()
+
+    def on_scroll(self, view, scroll_y):
+        if scroll_y >= 1 and self.has_older_page():
+            self.load_older_page()
+
+    def load_older_page(self):
+        rows = self.rows(self.pages)
+        self.pages += 1
+        self.view.data = rows + self.view.data
+
+        # Keep the rows that were shown in place, above them are the ones just loaded.
+        scrollable = len(self.view.data) * self.row_height - self.view.height
+        if scrollable > 0:
+            self.view.scroll_y = max(0, 1 - len(rows) * self.row_height / scrollable)
+
+    def scroll(self, rows):
+        scrollable = len(self.view.data) * self.row_height - self.view.height
+        if scrollable <= 0 and rows > 0 and self.has_older_page():
+            self.load_older_page()  # Everything loaded fits in the view, there is nothing to scroll yet.
+        elif scrollable > 0:
+            self.view.scroll_y = min(1, max(0, self.view.scroll_y + rows * self.row_height / scrollable))
+
+    def on_keyboard(self, instance, keyboard, keycode, text, modifiers):
+        page_rows = max(1, int(self.view.height // self.row_height))
+        if keycode == 82: # up: older messages
+            self.scroll(1)
+        elif keycode == 81: # down: newer messages
+            self.scroll(-1)
+        elif keycode == 75: # page up
+            self.scroll(page_rows)
+        elif keycode == 78: # page down
+            self.scroll(-page_rows)
+        else:
+            self.dismiss()
+        return True
+
+
+class CharScreenPopup(Popup):
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.title='Character'
+
+        main = BoxLayout(orientation='vertical')
+        main.add_widget(Label(text=f'Level: {engine.player.level.current_level}'))
+        main.add_widget(Label(text=f'XP: {engine.player.level.current_xp}'))
+        main.add_widget(Label(text=f'XP for next Level: {engine.player.level.experience_to_next_level}'))
+        main.add_widget(Label(text=f'Attack: {engine.player.fighter.power}'))
+        main.add_widget(Label(text=f'Defense: {engine.player.fighter.defense}'))
+        self.add_widget(main)
+
+
+class InventoryRow(RecycleDataViewBehavior, BoxLayout):
+    """A row of the inventory list: the tile of an item and its name."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'horizontal'
+        self.image = UxImage(size_hint=(.1, 1))
+        self.add_widget(self.image)
+        self.label = Label()
+        self.add_widget(self.label)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.image.texture = data['texture']
+        self.label.text = data['text']
+
+
+class InventoryPopup(Popup):    
+    row_height = 40
+
+    def __init__(self, engine: Engine, tileset: Tileset, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+        self.tileset = tileset
+
+        self.title = 'Inventory'
+
+        rows = []
+        for i, item in enumerate(engine.player.inventory.items):
+            item_key = chr(ord('a') + i)
+            item_string = f"({item_key}) {item.name}"
+
+            if engine.player.equipment.item_is_equipped(item):
+                item_string = f"{item_string} (E)"
+
+            rows.append({'texture': self.tileset.get_image(chr(item.tile)), 'text': item_string})
+
+        items = recycle_list(InventoryRow, self.row_height)
+        items.data = rows
+        self.add_widget(items)
+
+
+    def on_keyboard(self, instance, keyboard, keycode, text, modifiers):
+        self.select_item(text)
+        self.dismiss()
+
+    def select_item(self, key: str):
+        index = ord(key) - ord('a')
+
+        try:
+            selected_item = self.engine.player.inventory.items[index]
+            self.on_item_selected(selected_item)
+        except IndexError:
+            self.engine.message_log.add_message("Invalid entry.", color.invalid)
+
+    def on_item_selected(self, item: entity.Item):
+        """Called when the user selects a valid item."""
+        raise NotImplementedError()
+
+
+class InventoryActivatePopup(InventoryPopup):
+    def __init__(self, engine: Engine, game: GameWidget, **kwargs):
+        super().__init__(engine, game.tileset, **kwargs)
+        self.game = game
+
+        self.title = 'Select an item to use'
+        
+    def on_item_selected(self, item: entity.Item):
+        if item.consumable:
+            if item.consumable.selector == 'single_cell':
+                self.engine.message_log.add_message(
+                    "Select a target location.", color.needs_target
+                )
+                p = self.engine.player
+                action_factory = lambda xy: actions.ItemAction(self.engine.player, item, xy)
+                self.popup = SelectCellPopup(self.game, (p.x, p.y), action_factory)
+            elif item.consumable.selector == 'area':
+                p = self.engine.player
+                action_factory = lambda xy: actions.ItemAction(self.engine.player, item, xy)
+                self.popup = SelectAreaPopup(self.game, (p.x, p.y), action_factory, item.consumable.radius)
+            else:
+                self.action = item.consumable.get_action(self.engine.player)
+        elif item.equippable:
+            self.action = actions.EquipAction(self.engine.player, item)
+
+
+class InventoryDropPopup(InventoryPopup):
+    def __init__(self, engine: Engine, tileset: Tileset, **kwargs):
+        super().__init__(engine, tileset, **kwargs)
+
+        self.title = 'Select an item to drop'
+
+    def on_item_selected(self, item: entity.Item):
+        self.action = actions.DropItem(self.engine.player, item)
+
+
+class LevelUpPopup(Popup):
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+
+        self.title='Level Up!'
+
+        main = BoxLayout(orientation='vertical')
+        main.add_widget(Label(text='Congratulations! You level up!'))
+        main.add_widget(Label(text='Select an attribute to increase.'))
+        main.add_widget(Label(text=f'a) Constitution (+20 HP, from {engine.player.fighter.max_hp})'))
+        main.add_widget(Label(text=f'b) Strength (+1 attack, from {engine.player.fighter.power})'))
+        main.add_widget(Label(text=f'c) Agility (+1 defense, from {engine.player.fighter.defense})'))
+        self.add_widget(main)
+
+    def on_keyboard(self, instance, keyboard, keycode, text, modifiers):
+        if text == 'a':
+            self.engine.player.level.increase_max_hp()
+            self.level_up_choice = 'max_hp'
+            self.dismiss()
+        elif text == 'b':
+            self.engine.player.level.increase_power()
+            self.level_up_choice = 'power'
+            self.dismiss()
+        elif text == 'c':
+            self.engine.player.level.increase_defense()
+            self.level_up_choice = 'defense'
+            self.dismiss()
+        else:
+            self.engine.message_log.add_message("Invalid entry.", color.invalid)
@@ -0,0 +1,264 @@
+"""
+Drive the game without a window, to measure turns per second.
+
+    python headless.py --turns 5000 --seed 1
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import random
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import actions
+from components.consumable import HealingConsumable, LightningDamageConsumable
+from components.equipment import EquipmentType
+import perf
+from setup_game import new_game
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+PHASES = ("policy", "action", "ai", "fov", "procgen")
+
+
+class Policy:
+    """Decides what the player does next when nobody is at the keyboard."""
+
+    def choose_action(self, engine: Engine) -> actions.Action:
+        raise NotImplementedError()
+
+    def level_up(self, engine: Engine) -> None:
+        """Spend a pending level up, as `LevelUpPopup` would."""
+        engine.player.level.increase_power()
+
+
+class ScriptedPolicy(Policy):
+    """Replays a fixed sequence of action factories, then waits."""
+
+    def __init__(self, script: Iterable[Callable[[Engine], actions.Action]]):
+        self.script = iter(script)
+
+    def choose_action(self, engine: Engine) -> actions.Action:
+        factory = next(self.script, None)
+        if factory is None:
+            return actions.WaitAction(engine.player)
+        return factory(engine)
+
+
+class ExplorerBot(Policy):
+    """
+    A simple bot: drinks potions when hurt, fights what it sees, picks up loot,
+    then explores until it finds the stairs and descends.
+    """
+
+    def __init__(self) -> None:
+        self._level_ups = 0
+
+    def level_up(self, engine: Engine) -> None:
+        level = engine.player.level
+        choice = self._level_ups % 3
+        if choice == 0:
+            level.increase_max_hp()
+        elif choice == 1:
+            level.increase_power()
+        else:
+            level.increase_defense()
+        self._level_ups += 1
+
+    def choose_action(self, engine: Engine) -> actions.Action:
+        player = engine.player
+        game_map = engine.game_map
+        inventory = player.inventory.items
+
+        if player.fighter.hp * 2 < player.fighter.max_hp:
+            for item in inventory:
+                if isinstance(item.consumable, HealingConsumable):
+                    return actions.ItemAction(player, item)
+
+        enemies = [
+            actor for actor in game_map.actors
+            if actor is not player and game_map.visible[actor.x, actor.y]
+        ]
+        if enemies:
+            target = min(enemies, key=lambda a: max(abs(a.x - player.x), abs(a.y - player.y)))
+            dx, dy = target.x - player.x, target.y - player.y
+            if max(abs(dx), abs(dy)) <= 1:
+                return actions.BumpAction(player, dx, dy)
+
+            for item in inventory:
+                consumable = item.consumable
+                if isinstance(consumable, LightningDamageConsumable) and (
+                    player.distance(target.x, target.y) <= consumable.maximum_range
+                ):
+                    return actions.ItemAction(player, item)
+
+            step = self.step_towards(engine, lambda x, y: (x, y) == (target.x, target.y))
+            if step:
+                return actions.BumpAction(player, *step)
+
+        if game_map.top_item_at(player.x, player.y) and len(inventory) < player.inventory.capacity:
+            return actions.PickupAction(player)
+
+        for item in inventory:
+            if item.equippable and self.is_upgrade(player, item):
+                return actions.EquipAction(player, item)
+
+        if (player.x, player.y) == game_map.downstairs_location:
+            return actions.TakeStairsAction(player)
+
+        visible_loot = {xy for xy in game_map.item_stacks if game_map.visible[xy]}
+        if visible_loot and len(inventory) < player.inventory.capacity:
+            step = self.step_towards(engine, lambda x, y: (x, y) in visible_loot)
+            if step:
+                return actions.BumpAction(player, *step)
+
+        explored = game_map.explored.to_array()
+        step = self.step_towards(engine, lambda x, y: not explored[x, y])
+        if step is None and explored[game_map.downstairs_location]:
+            step = self.step_towards(engine, lambda x, y: (x, y) == game_map.downstairs_location)
+        if step:
+            return actions.BumpAction(player, *step)
+
+        return actions.BumpAction(player, *random.choice(DIRECTIONS))
+
+    @staticmethod
+    def is_upgrade(player: Actor, item) -> bool:
+        equipment = player.equipment
+        if equipment.item_is_equipped(item):
+            return False
+        slot = equipment.weapon if item.equippable.equipment_type == EquipmentType.WEAPON else equipment.armor
+        if slot is None:
+            return True
+        current = slot.equippable.power_bonus + slot.equippable.defense_bonus
+        return item.equippable.power_bonus + item.equippable.defense_bonus > current
+
+    @staticmethod
+    def step_towards(engine: Engine, is_goal: Callable[[int, int], bool]) -> Optional[Tuple[int, int]]:
+        """Return the first step of the shortest walkable path to the nearest goal cell, if any."""
+        game_map = engine.game_map
+        walkable = game_map.walkable
+        start = (engine.player.x, engine.player.y)
+
+        came_from: Dict[Tuple[int, int], Tuple[int, int]] = {start: start}
+        queue = collections.deque([start])
+        while queue:
+            x, y = queue.popleft()
+            if (x, y) != start and is_goal(x, y):
+                while came_from[(x, y)] != start:
+                    x, y = came_from[(x, y)]
+                return x - start[0], y - start[1]
+            for dx, dy in DIRECTIONS:
+                nxt = (x + dx, y + dy)
+                if nxt not in came_from and game_map.in_bounds(*nxt) and walkable[nxt]:
+                    came_from[nxt] = (x, y)
+                    queue.append(nxt)
+
+        return None
+
+
+def run_game(
+    turns: int,
+    seed: int,
+    policy: Optional[Policy] = None,
+    map_width: int = 40,
+    map_height: int = 40,
+    generator: str = "rooms",
+    use_actor_store: bool = False,
+    corpse_decay: Optional[int] = None,
+    chunk_dir: Optional[str] = None,
+) -> Tuple[Engine, Dict]:
+    """
+    Play one seeded game for up to `turns` player turns, or until the player dies.
+
+    Returns the final engine and a report with turns per second and time spent per phase.
+    """
+    policy = policy or ExplorerBot()
+    random.seed(seed)
+    np.random.seed(seed)
+
+    perf.timers.reset()
+    perf.timers.enabled = True
+    started = time.perf_counter()
+
+    engine = new_game(
+        max_rooms=5,
+        room_min_size=6,
+        room_max_size=10,
+        map_height=map_height,
+        map_width=map_width,
+        generator=generator,
+        use_actor_store=use_actor_store,
+        corpse_decay=corpse_decay,
+        chunk_dir=chunk_dir,
+    )
+
+    played = 0
+    while played < turns and engine.player.is_alive:
+        if engine.player.level.requires_level_up:
+            policy.level_up(engine)
+
+        with perf.phase("policy"):
+            action = policy.choose_action(engine)
+
+        if not engine.handle_player_action(action):
+            # Fall back to a random step, or to waiting, so that the game always moves on.
+            fallback = actions.BumpAction(engine.player, *random.choice(DIRECTIONS))
+            if not engine.handle_player_action(fallback):
+                engine.handle_player_action(actions.WaitAction(engine.player))
+        played += 1
+
+    elapsed = time.perf_counter() - started
+    perf.timers.enabled = False
+
+    report = {
+        "seed": seed,
+        "turns": played,
+        "seconds": elapsed,
+        "turns_per_second": played / elapsed if elapsed else 0.0,
+        "floor": engine.game_world.current_floor,
+        "alive": engine.player.is_alive,
+        "phases": {name: perf.timers.totals.get(name, 0.0) for name in PHASES},
+    }
+    return engine, report
+
+
+def format_report(report: Dict) -> str:
+    lines = [
+        f"seed {report['seed']}: {report['turns']} turns in {report['seconds']:.3f}s "
+        f"({report['turns_per_second']:.0f} turns/s), reached floor {report['floor']}"
+        + ("" if report["alive"] else ", died"),
+    ]
+    for name, seconds in report["phases"].items():
+        share = seconds / report["seconds"] * 100 if report["seconds"] else 0.0
+        lines.append(f"  {name:<8} {seconds:8.3f}s {share:5.1f}%")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--height", type=int, default=40)
+    parser.add_argument("--generator", choices=("rooms", "caves"), default="rooms")
+    parser.add_argument("--actor-store", action="store_true", help="keep monsters in numpy arrays")
+    parser.add_argument("--corpse-decay", type=int, help="time units before corpses fade, kept for good if unset")
+    parser.add_argument("--chunk-dir", help="keep the layers of every floor in temporary files in this directory")
+    args = parser.parse_args()
+
+    _, report = run_game(
+        args.turns, args.seed, map_width=args.width, map_height=args.height, generator=args.generator,
+        use_actor_store=args.actor_store, corpse_decay=args.corpse_decay, chunk_dir=args.chunk_dir,
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
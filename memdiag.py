@@ -0,0 +1,104 @@
+"""
+Memory diagnostics: snapshots of allocations and live objects, compared between checkpoints.
+
+The game takes a checkpoint at every floor change and every screen switch. While diagnostics
+are off a checkpoint costs a single attribute check, once `start` is called each one records a
+`tracemalloc` snapshot and the number of live objects of each type, and reports what grew since
+the previous checkpoint, by type and by allocation site.
+"""
+from __future__ import annotations
+
+import collections
+import gc
+import tracemalloc
+from typing import Callable, Counter, List, Optional, Tuple
+
+TRACEBACK_FRAMES = 8  # Frames kept for each allocation, enough to tell apart the callers of a helper.
+TOP = 10  # Lines of each kind in a report.
+
+
+def count_objects() -> Counter[str]:
+    """Number of objects tracked by the garbage collector, by type name."""
+    gc.collect()
+    return collections.Counter(type(obj).__qualname__ for obj in gc.get_objects())
+
+
+class Checkpoint:
+    def __init__(self, label: str):
+        self.label = label
+        self.snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        self.objects = count_objects()
+        self.traced = tracemalloc.get_traced_memory()[0]
+
+
+class MemoryDiagnostics:
+    def __init__(self, log: Callable[[str], None] = print) -> None:
+        self.enabled = False
+        self.log = log  # Where the report of each checkpoint goes.
+        self.baseline: Optional[Checkpoint] = None
+        self.last: Optional[Checkpoint] = None
+
+    def start(self, frames: int = TRACEBACK_FRAMES) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.enabled = True
+        self.baseline = self.last = Checkpoint("start")
+
+    def stop(self) -> None:
+        self.enabled = False
+        self.baseline = self.last = None
+        tracemalloc.stop()
+
+    def checkpoint(self, label: str) -> Optional[str]:
+        """Take a checkpoint, log and return a report of the growth since the previous one."""
+        if not self.enabled:
+            return None
+        checkpoint = Checkpoint(label)
+        report = self.report(self.last, checkpoint)
+        self.last = checkpoint
+        self.log(report)
+        return report
+
+    def growth(self, since: Optional[Checkpoint] = None) -> int:
+        """Bytes allocated and still alive since a checkpoint, the baseline by default."""
+        since = since or self.baseline
+        assert since is not None, "diagnostics are not started"
+        return tracemalloc.get_traced_memory()[0] - since.traced
+
+    @staticmethod
+    def growth_by_type(old: Checkpoint, new: Checkpoint) -> List[Tuple[str, int]]:
+        """Types whose number of live objects grew, most grown first."""
+        grown = new.objects - old.objects  # Counter subtraction keeps the positive counts only.
+        return grown.most_common(TOP)
+
+    @staticmethod
+    def growth_by_site(old: Checkpoint, new: Checkpoint) -> List[tracemalloc.StatisticDiff]:
+        """Source lines whose live allocations grew, most grown first."""
+        diffs = new.snapshot.compare_to(old.snapshot, "lineno")
+        return [diff for diff in diffs if diff.size_diff > 0][:TOP]
+
+    def report(self, old: Optional[Checkpoint], new: Checkpoint) -> str:
+        if old is None:
+            return f"memory at {new.label}: {new.traced / 1024:.1f} KiB traced"
+
+        lines = [
+            f"memory from {old.label} to {new.label}: {(new.traced - old.traced) / 1024:+.1f} KiB,"
+            f" {new.traced / 1024:.1f} KiB traced",
+        ]
+        for name, count in self.growth_by_type(old, new):
+            lines.append(f"  {count:+8d} {name}")
+        for diff in self.growth_by_site(old, new):
+            frame = diff.traceback[0]
+            lines.append(f"  {diff.size_diff / 1024:+8.1f} KiB {frame.filename}:{frame.lineno}")
+        return "\n".join(lines)
+
+
+diagnostics = MemoryDiagnostics()
+
+
+def checkpoint(label: str) -> Optional[str]:
+    """Take a checkpoint with the global diagnostics, if they are on."""
+    return diagnostics.checkpoint(label)
@@ -1,14 +1,52 @@
-from typing import List, Tuple
+from __future__ import annotations
+
+from array import array
+from collections import deque
+import json
+import os
+import string
+import sys
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 import color
 
+DEFAULT_CAPACITY = 100  # Messages kept in memory, and pickled with the game.
+PAGE_SIZE = 20
+
+
+class MessageFormatter(string.Formatter):
+    """`str.format` with an extra `!c` conversion, that capitalizes the argument."""
+
+    def convert_field(self, value: Any, conversion: Optional[str]) -> Any:
+        if conversion == "c":
+            return str(value).capitalize()
+        return super().convert_field(value, conversion)
+
+
+formatter = MessageFormatter()
+
 
 class Message:
-    def __init__(self, text: str, color: Tuple[int, int, int]):
-        self.plain_text = text
+    """
+    A message template with its arguments, formatted only when the message is shown.
+
+    Templates are interned, so that messages share them, and compare by identity when stacking.
+    """
+
+    __slots__ = ("template", "args", "color", "count")
+
+    def __init__(self, template: str, color: Tuple[int, int, int], args: Tuple = ()):
+        self.template = template
+        self.args = args
         self.color = color
         self.count = 1
 
+    @property
+    def plain_text(self) -> str:
+        if not self.args:
+            return self.template
+        return formatter.vformat(self.template, self.args, {})
+
     @property
     def full_text(self) -> str:
         """The full text of this message, including the count if necessary."""
@@ -16,20 +54,162 @@ class Message:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def __getstate__(self) -> Tuple:
+        return self.template, self.args, self.color, self.count
+
+    def __setstate__(self, state: Tuple) -> None:
+        template, self.args, self.color, self.count = state
+        self.template = sys.intern(template)
+
 
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    """
+    The most recent messages, in a ring buffer of fixed capacity.
+
+    Messages that fall out of the buffer are lost, unless the log spills them to a file,
+    one JSON line each, from which older history is read back a page at a time. A saved log
+    keeps only the buffer and where its spill file ended, and picks that file up again when
+    loaded, if it still holds the same history.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, spill_path: Optional[str] = None) -> None:
+        self.messages: Deque[Message] = deque(maxlen=capacity)
+        self.spill_path: Optional[str] = None
+        self._spill_offsets = array("q")  # Offset of each spilled message in the spill file.
+        self._spill_file = None
+        self._spill_id = ""  # Written at the top of the spill file, to tell it from the file of another game.
+        if spill_path is not None:
+            self.spill_to(spill_path)
+
+    def __len__(self) -> int:
+        """Number of messages in the whole history, spilled ones included."""
+        return len(self._spill_offsets) + len(self.messages)
+
+    def spill_to(self, path: str) -> None:
+        """Start spilling old messages to a new file at `path`, replacing any previous one."""
+        self.close()
+        self.spill_path = path
+        self._spill_offsets = array("q")
+        self._spill_id = os.urandom(8).hex()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._spill_id) + "\n")
+
+    def close(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
 
     def add_message(
-        self, text: str, color: Tuple[int, int, int] = color.white, *, stack: bool = True,
+        self,
+        text: str,
+        color: Tuple[int, int, int] = color.white,
+        *,
+        args: Tuple = (),
+        stack: bool = True,
     ) -> None:
         """Add a message to this log.
         `text` is the message text, `fg` is the text color.
+        If `args` are given, `text` is a template they are formatted into
+        when the message is shown, see `MessageFormatter`.
         If `stack` is True then the message can stack with a previous message
         of the same text.
         """
-        if stack and self.messages and text == self.messages[-1].plain_text:
-            self.messages[-1].count += 1
-        else:
-            self.messages.append(Message(text, color))
+        text = sys.intern(text)
+        if stack and self.messages:
+            last = self.messages[-1]
+            if last.template is text and last.args == args:
+                last.count += 1
+                return
+
+        if len(self.messages) == self.messages.maxlen and self.spill_path is not None:
+            self._spill(self.messages[0])
+        self.messages.append(Message(text, color, args))
+
+    def _spill(self, message: Message) -> None:
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_path, "a+", encoding="utf-8")
+        f = self._spill_file
+        f.seek(0, 2)
+        self._spill_offsets.append(f.tell())
+        f.write(json.dumps([message.template, message.args, message.color, message.count]) + "\n")
+        f.flush()
+
+    def latest(self, n: int) -> List[Message]:
+        """The last `n` messages, oldest first."""
+        n = min(n, len(self.messages))
+        return [self.messages[i] for i in range(len(self.messages) - n, len(self.messages))]
+
+    def page_count(self, page_size: int = PAGE_SIZE) -> int:
+        return max(1, -(-len(self) // page_size))
+
+    def page(self, index: int, page_size: int = PAGE_SIZE) -> List[Message]:
+        """
+        Page `index` of the history, counting back from the most recent messages, oldest first.
+
+        Page 0 holds the latest `page_size` messages. Older pages may be read from the spill file.
+        """
+        end = len(self) - index * page_size
+        start = max(end - page_size, 0)
+        if end <= 0:
+            return []
+
+        spilled = len(self._spill_offsets)
+        result = self._read_spilled(start, min(end, spilled)) if start < spilled else []
+        result.extend(self.messages[i - spilled] for i in range(max(start, spilled), end))
+        return result
+
+    def _read_spilled(self, start: int, end: int) -> List[Message]:
+        result = []
+        with open(self.spill_path, "rb") as f:
+            f.seek(self._spill_offsets[start])
+            for _ in range(start, end):
+                template, args, fg, count = json.loads(f.readline())
+                message = Message(sys.intern(template), tuple(fg), tuple(args))
+                message.count = count
+                result.append(message)
+        return result
+
+    def _spill_end(self) -> int:
+        """Size of the spill file up to the last message spilled."""
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        return os.path.getsize(self.spill_path) if self.spill_path is not None else 0
+
+    def __getstate__(self) -> Dict:
+        # A save keeps the buffer and where the spill file ended, not the spilled messages themselves.
+        state = self.__dict__.copy()
+        del state["_spill_file"]
+        state["_spill_offsets"] = len(self._spill_offsets)
+        state["_spill_end"] = self._spill_end()
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        spilled = state.pop("_spill_offsets")
+        end = state.pop("_spill_end", 0)
+        state.pop("_detached", None)  # Saves that carried their spilled messages, dropped.
+        self.__dict__.update(state)
+        self._spill_file = None
+        self._spill_offsets = array("q")
+        if self.spill_path is not None and not self._resume_spill(spilled, end):
+            # The file was replaced by another game, or removed: the older history is gone.
+            self.spill_to(self.spill_path)
+
+    def _resume_spill(self, spilled: int, end: int) -> bool:
+        """Find the `spilled` messages of this log in its spill file, and drop what was spilled after `end`."""
+        try:
+            with open(self.spill_path, "r+b") as f:
+                if f.readline() != (json.dumps(self.__dict__.get("_spill_id")) + "\n").encode():
+                    return False
+                offsets = array("q")
+                while len(offsets) < spilled:
+                    offset = f.tell()
+                    if not f.readline():
+                        return False
+                    offsets.append(offset)
+                if f.tell() != end:
+                    return False
+                f.truncate(end)  # Messages of a session that went on after this save.
+        except OSError:
+            return False
+        self._spill_offsets = offsets
+        return True
@@ -0,0 +1,147 @@
+"""Named timers for the phases of a game turn."""
+from __future__ import annotations
+
+import collections
+import csv
+import time
+from typing import IO, Any, Deque, Dict, List, Optional, Tuple
+
+ROLLING_TURNS = 200  # Turns the rolling statistics are computed over.
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class _Phase:
+    __slots__ = ("timers", "name")
+
+    def __init__(self, timers: PhaseTimers, name: str):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timers.start(self.name)
+
+    def __exit__(self, *exc_info) -> None:
+        self.timers.stop()
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class PhaseTimers:
+    """
+    Accumulates wall time per named phase.
+
+    Timing is exclusive: while a nested phase runs (procgen inside the stairs action for example)
+    its time is charged to the nested phase only. When disabled, `phase` returns a shared no-op
+    context manager, so instrumented code pays a single attribute check.
+
+    `end_turn` marks a turn boundary: the time of each phase since the previous boundary is kept
+    for the rolling statistics of the last ROLLING_TURNS turns, and written to the CSV trace if any.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._stack: List[List] = []  # [name, time the phase was last resumed]
+
+        self.turns = 0
+        self.recent: Deque[Dict[str, float]] = collections.deque(maxlen=ROLLING_TURNS)
+        self._turn_totals: Dict[str, float] = {}  # `totals` at the last turn boundary.
+        self._trace_file: Optional[IO[str]] = None
+        self._trace: Any = None
+
+    def reset(self) -> None:
+        self.totals.clear()
+        self.counts.clear()
+        self._stack.clear()
+        self.turns = 0
+        self.recent.clear()
+        self._turn_totals.clear()
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def start(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self._charge(parent[0], now - parent[1])
+        self._stack.append([name, now])
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def stop(self) -> None:
+        now = time.perf_counter()
+        name, resumed = self._stack.pop()
+        self._charge(name, now - resumed)
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def _charge(self, name: str, elapsed: float) -> None:
+        self.totals[name] = self.totals.get(name, 0.0) + elapsed
+
+    def end_turn(self) -> None:
+        """Close the current turn: record the time each phase took since the previous call."""
+        if not self.enabled:
+            return
+
+        turn = {
+            name: total - self._turn_totals.get(name, 0.0)
+            for name, total in self.totals.items()
+            if total != self._turn_totals.get(name, 0.0)
+        }
+        self._turn_totals = dict(self.totals)
+        self.turns += 1
+        self.recent.append(turn)
+
+        if self._trace is not None:
+            for name, seconds in sorted(turn.items()):
+                self._trace.writerow((self.turns, name, f"{seconds * 1000:.4f}"))
+
+    def percentiles(self) -> Dict[str, Tuple[float, float]]:
+        """The (p50, p95) time per turn of each phase over the recent turns, in seconds."""
+        names = {name for turn in self.recent for name in turn}
+        result = {}
+        for name in sorted(names):
+            values = sorted(turn.get(name, 0.0) for turn in self.recent)
+            result[name] = (_percentile(values, 0.5), _percentile(values, 0.95))
+        return result
+
+    def trace_to(self, path: str) -> None:
+        """Write the time of each phase of every following turn to a CSV file, as turn,phase,ms rows."""
+        self.close_trace()
+        self._trace_file = open(path, "w", newline="")
+        self._trace = csv.writer(self._trace_file)
+        self._trace.writerow(("turn", "phase", "ms"))
+
+    def close_trace(self) -> None:
+        if self._trace_file is not None:
+            self._trace_file.close()
+        self._trace_file = None
+        self._trace = None
+
+
+timers = PhaseTimers()
+
+
+def phase(name: str):
+    """Time the enclosed block under `name` with the global timers."""
+    return timers.phase(name)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import random
-from typing import Iterator, List, Tuple, TYPE_CHECKING
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
 
 from game_map import GameMap
 import entity_factories
@@ -131,11 +133,8 @@ def tunnel_between(
             yield x1+dx*dir, y2
 
 
-def place_entities(
-    room: RectangularRoom,
-    dungeon: GameMap,
-    floor_number: int,
-) -> None:
+def pick_entities(floor_number: int) -> List[Entity]:
+    """The monsters and items to put in one room of a floor."""
     number_of_monsters = random.randint(
         0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
     )
@@ -151,7 +150,15 @@ def place_entities(
         item_chances, number_of_items, floor_number
     )
 
-    for entity in monsters + items:
+    return monsters + items
+
+
+def place_entities(
+    room: RectangularRoom,
+    dungeon: GameMap,
+    floor_number: int,
+) -> None:
+    for entity in pick_entities(floor_number):
         x = random.randint(room.x1 + 1, room.x2 - 1)
         y = random.randint(room.y1 + 1, room.y2 - 1)
 
@@ -166,10 +173,16 @@ def generate_dungeon(
     map_width: int,
     map_height: int,
     engine: Engine,
+    use_actor_store: bool = False,
+    corpse_decay: Optional[int] = None,
+    chunk_dir: Optional[str] = None,
 ) -> GameMap:
     """Generate a new dungeon map."""
     player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, [player])
+    dungeon = GameMap(
+        engine, map_width, map_height, [player],
+        use_actor_store=use_actor_store, corpse_decay=corpse_decay, chunk_dir=chunk_dir,
+    )
 
     rooms: List[RectangularRoom] = []
 
@@ -191,7 +204,7 @@ def generate_dungeon(
         # If there are no intersections then the room is valid.
 
         # Dig out this rooms inner area.
-        dungeon.tiles[new_room.inner] = tiles.floor
+        dungeon.set_tiles(new_room.inner, tiles.floor)
 
         if len(rooms) == 0:
             # The first room, where the player starts.
@@ -199,7 +212,7 @@ def generate_dungeon(
         else:  # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
             for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tiles.floor
+                dungeon.set_tiles((x, y), tiles.floor)
 
         center_of_last_room = new_room.center
 
@@ -208,7 +221,159 @@ def generate_dungeon(
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
-    dungeon.tiles[center_of_last_room] = tiles.down_stairs
+    dungeon.set_tiles(center_of_last_room, tiles.down_stairs)
     dungeon.downstairs_location = center_of_last_room
 
     return dungeon
+
+
+CAVE_WALL_CHANCE = 0.45  # Chance of a cell starting as wall, before smoothing.
+CAVE_SMOOTHING_STEPS = 4
+CAVE_CELLS_PER_ROOM = 100  # Cave floor that gets as many monsters and items as one room does.
+
+
+def neighbour_counts(grid: np.ndarray) -> np.ndarray:
+    """For each cell, the number of True cells in the 3x3 block around it, itself included. Outside counts as True."""
+    width, height = grid.shape
+    padded = np.pad(grid, 1, constant_values=True).astype(np.uint8)
+    counts = np.zeros((width, height), dtype=np.uint8)
+    for dx in range(3):
+        for dy in range(3):
+            counts += padded[dx:dx + width, dy:dy + height]
+    return counts
+
+
+def cave_walls(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Random walls smoothed into caves: a cell becomes wall when at least 5 cells of its 3x3 block are."""
+    walls = rng.random((width, height)) < CAVE_WALL_CHANCE
+    for _ in range(CAVE_SMOOTHING_STEPS):
+        walls = neighbour_counts(walls) >= 5
+        walls[[0, -1], :] = walls[:, [0, -1]] = True
+    return walls
+
+
+def largest_region(passable: np.ndarray) -> np.ndarray:
+    """
+    The largest group of passable cells connected in 8 directions.
+
+    Cells are grouped in runs along y, and runs of neighbouring columns that touch are joined
+    with a union-find done in array operations: every round hooks the root of each joined pair
+    onto the smaller root, then points every run at its root, until no pair is left apart.
+    """
+    width, height = passable.shape
+    cells = np.zeros((width, height + 1), dtype=bool)  # An extra row, so that runs end with their column.
+    cells[:, :height] = passable
+    flat = cells.ravel()
+
+    starts = flat & ~np.concatenate(([False], flat[:-1]))
+    run_of = np.cumsum(starts) - 1  # Run index of each passable cell.
+    n_runs = int(starts.sum())
+    if n_runs == 0:
+        return passable.copy()
+
+    # Pairs of runs touching across neighbouring columns, straight or diagonally.
+    run_grid = run_of.reshape(width, height + 1)[:, :height]
+    a, b = [], []
+    for dy in (-1, 0, 1):
+        ys = slice(max(dy, 0), height + min(dy, 0))
+        ys_next = slice(max(-dy, 0), height + min(-dy, 0))
+        touching = passable[:-1, ys] & passable[1:, ys_next]
+        a.append(run_grid[:-1, ys][touching])
+        b.append(run_grid[1:, ys_next][touching])
+    a, b = np.concatenate(a), np.concatenate(b)
+
+    labels = np.arange(n_runs)  # The parent of each run, lower than the run itself but at a root.
+    while True:
+        root_a, root_b = labels[a], labels[b]
+        apart = root_a != root_b
+        if not apart.any():
+            break
+        a, b, root_a, root_b = a[apart], b[apart], root_a[apart], root_b[apart]
+        np.minimum.at(labels, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+    run_sizes = np.bincount(run_of[flat], minlength=n_runs)
+    region = np.argmax(np.bincount(labels, weights=run_sizes))
+    keep = np.zeros(flat.shape, dtype=bool)
+    keep[flat] = labels[run_of[flat]] == region
+    return keep.reshape(width, height + 1)[:, :height]
+
+
+def farthest_cell(passable: np.ndarray, start: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    The passable cell the most steps away from `start`, moving in 8 directions.
+
+    A breadth first search on flat cell indices, a whole frontier at a time, so each step only
+    costs as much as its frontier.
+    """
+    width, height = passable.shape
+    padded_height = height + 2
+    open_cells = np.pad(passable, 1).ravel()  # Walls all around, so neighbours never wrap.
+    offsets = np.array([
+        dx * padded_height + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy
+    ])
+
+    claimed_by = np.zeros(open_cells.shape, dtype=np.int64)  # Scratch space to drop duplicate neighbours.
+
+    frontier = np.array([(start[0] + 1) * padded_height + start[1] + 1])
+    open_cells[frontier] = False
+    last = frontier
+    while len(frontier):
+        last = frontier
+        neighbours = (frontier[:, None] + offsets).ravel()
+        neighbours = neighbours[open_cells[neighbours]]
+        # A cell reached from several frontier cells is kept once, where its last claim was written.
+        order = np.arange(len(neighbours))
+        claimed_by[neighbours] = order
+        frontier = neighbours[claimed_by[neighbours] == order]
+        open_cells[frontier] = False
+
+    x, y = divmod(int(last.min()), padded_height)
+    return x - 1, y - 1
+
+
+def place_cave_entities(floor: np.ndarray, dungeon: GameMap, floor_number: int) -> None:
+    """Scatter as many monsters and items over the cave floor as rooms of the same area would hold."""
+    cells = np.flatnonzero(floor)
+    occupied = {(entity.x, entity.y) for entity in dungeon.entities}
+    for _ in range(max(len(cells) // CAVE_CELLS_PER_ROOM, 1)):
+        for entity in pick_entities(floor_number):
+            x, y = divmod(int(cells[random.randrange(len(cells))]), dungeon.height)
+            if (x, y) not in occupied:
+                occupied.add((x, y))
+                entity.spawn(dungeon, x, y)
+
+
+def generate_caves(
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+    use_actor_store: bool = False,
+    corpse_decay: Optional[int] = None,
+    chunk_dir: Optional[str] = None,
+) -> GameMap:
+    """Generate a cave map: cellular automata caves, trimmed to their largest connected part."""
+    player = engine.player
+    dungeon = GameMap(
+        engine, map_width, map_height, [player],
+        use_actor_store=use_actor_store, corpse_decay=corpse_decay, chunk_dir=chunk_dir,
+    )
+
+    # Seeded from `random`, so that floors are reproduced from the seed of the game.
+    rng = np.random.default_rng(random.getrandbits(64))
+    floor = largest_region(~cave_walls(map_width, map_height, rng))
+    dungeon.set_tiles(floor, tiles.floor)
+
+    cells = np.flatnonzero(floor)
+    player.place(*divmod(int(cells[random.randrange(len(cells))]), map_height), dungeon)
+    place_cave_entities(floor, dungeon, engine.game_world.current_floor)
+
+    stairs = farthest_cell(floor, (player.x, player.y))
+    dungeon.set_tiles(stairs, tiles.down_stairs)
+    dungeon.downstairs_location = stairs
+
+    return dungeon
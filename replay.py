@@ -0,0 +1,190 @@
+"""
+Record play sessions and replay them headless, as fast as possible.
+
+    python replay.py session.replay.json --repeat 5
+
+A replay fails if the final state of the game does not match the recorded one.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import actions
+import perf
+from setup_game import new_game
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+Command = List[Any]
+
+LEVEL_UP_CHOICES = ("max_hp", "power", "defense")
+
+
+def encode_action(engine: Engine, action: actions.Action) -> Command:
+    """Turn a player action into a JSON friendly command, items are referred to by inventory slot."""
+    if isinstance(action, actions.BumpAction):
+        return ["bump", action.dx, action.dy]
+    if isinstance(action, actions.WaitAction):
+        return ["wait"]
+    if isinstance(action, actions.PickupAction):
+        return ["pickup"]
+    if isinstance(action, actions.TakeStairsAction):
+        return ["stairs"]
+
+    inventory = engine.player.inventory.items
+    if isinstance(action, actions.DropItem):
+        return ["drop", inventory.index(action.item)]
+    if isinstance(action, actions.ItemAction):
+        return ["item", inventory.index(action.item), *action.target_xy]
+    if isinstance(action, actions.EquipAction):
+        return ["equip", inventory.index(action.item)]
+
+    raise ValueError(f"Cannot record {type(action).__name__}")
+
+
+def decode_action(engine: Engine, command: Command) -> actions.Action:
+    player = engine.player
+    kind, args = command[0], command[1:]
+
+    if kind == "bump":
+        return actions.BumpAction(player, *args)
+    if kind == "wait":
+        return actions.WaitAction(player)
+    if kind == "pickup":
+        return actions.PickupAction(player)
+    if kind == "stairs":
+        return actions.TakeStairsAction(player)
+
+    item = player.inventory.items[args[0]]
+    if kind == "drop":
+        return actions.DropItem(player, item)
+    if kind == "item":
+        return actions.ItemAction(player, item, tuple(args[1:]))
+    if kind == "equip":
+        return actions.EquipAction(player, item)
+
+    raise ValueError(f"Unknown command {kind!r}")
+
+
+def apply_command(engine: Engine, command: Command) -> None:
+    if command[0] == "level_up":
+        getattr(engine.player.level, f"increase_{command[1]}")()
+    else:
+        engine.handle_player_action(decode_action(engine, command))
+
+
+def state_hash(engine: Engine) -> str:
+    """Digest of the parts of the game state a replay must reproduce exactly."""
+    player = engine.player
+    game_map = engine.game_map
+    state = (
+        engine.game_world.current_floor,
+        game_map.scheduler.time,
+        (player.x, player.y, player.fighter.hp, player.fighter.max_hp),
+        (player.fighter.base_power, player.fighter.base_defense),
+        (player.level.current_level, player.level.current_xp),
+        [item.name for item in player.inventory.items],
+        [item.name for item in (player.equipment.weapon, player.equipment.armor) if item],
+        # Buried remains count as entities, as they were before, so that older recordings still match.
+        sorted([(e.name, e.x, e.y) for e in game_map.entities] + [(d.name, x, y) for x, y, d in game_map.decals]),
+        sorted((a.name, a.x, a.y, a.fighter.hp) for a in game_map.actors),
+        game_map.explored.to_array().tobytes(),  # Unpacked, so that older recordings still match.
+    )
+    return hashlib.sha256(repr(state).encode()).hexdigest()
+
+
+class SessionRecorder:
+    """Collects the commands of a play session started from a known seed."""
+
+    def __init__(self, seed: int, settings: Dict[str, int]):
+        self.seed = seed
+        self.settings = settings
+        self.commands: List[Command] = []
+
+    def record_action(self, engine: Engine, action: actions.Action) -> None:
+        """Record an action, must be called before the action is performed."""
+        self.commands.append(encode_action(engine, action))
+
+    def record_level_up(self, choice: str) -> None:
+        assert choice in LEVEL_UP_CHOICES
+        self.commands.append(["level_up", choice])
+
+    def save(self, engine: Engine, filename: str) -> None:
+        trace = {
+            "seed": self.seed,
+            "settings": self.settings,
+            "commands": self.commands,
+            "state_hash": state_hash(engine),
+        }
+        with open(filename, "w") as f:
+            json.dump(trace, f)
+
+
+def load_trace(filename: str) -> Dict:
+    with open(filename) as f:
+        return json.load(f)
+
+
+def replay(trace: Dict) -> Dict:
+    """Replay a recorded session, return whether the final state matches along with timings per phase."""
+    random.seed(trace["seed"])
+
+    perf.timers.reset()
+    perf.timers.enabled = True
+    started = time.perf_counter()
+
+    engine = new_game(**trace["settings"])
+    perf.timers.end_turn()
+    for command in trace["commands"]:
+        apply_command(engine, command)
+        perf.timers.end_turn()
+
+    elapsed = time.perf_counter() - started
+    perf.timers.enabled = False
+
+    return {
+        "matches": state_hash(engine) == trace["state_hash"],
+        "commands": len(trace["commands"]),
+        "seconds": elapsed,
+        "phases": dict(perf.timers.totals),
+        "percentiles": perf.timers.percentiles(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("trace")
+    parser.add_argument("--repeat", type=int, default=1, help="replay several times, report the fastest run")
+    parser.add_argument("--csv", help="write the time of each phase per command of the last run to this file")
+    args = parser.parse_args(argv)
+
+    trace = load_trace(args.trace)
+    results = []
+    for i in range(args.repeat):
+        if args.csv and i == args.repeat - 1:
+            perf.timers.trace_to(args.csv)
+        results.append(replay(trace))
+    perf.timers.close_trace()
+    best = min(results, key=lambda result: result["seconds"])
+
+    print(f"{best['commands']} commands in {best['seconds']:.3f}s (best of {args.repeat})")
+    print(f"  {'phase':<8} {'total':>9} {'p50':>9} {'p95':>9}")
+    for name, seconds in sorted(best["phases"].items()):
+        p50, p95 = best["percentiles"].get(name, (0.0, 0.0))
+        print(f"  {name:<8} {seconds:8.3f}s {p50 * 1000:7.3f}ms {p95 * 1000:7.3f}ms")
+
+    if not all(result["matches"] for result in results):
+        print("final state does not match the recording", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
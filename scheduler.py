@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Actor
+    from game_map import GameMap
+
+NORMAL_SPEED = 100  # Speed at which an action takes exactly its cost in time units.
+
+
+class TurnScheduler:
+    """
+    Orders the actors of a GameMap by the time of their next action.
+
+    Actors sit in a heap keyed by their next action time. Entries are never removed eagerly:
+    dead, removed or rescheduled actors are dropped when their entry reaches the top of the heap.
+    """
+
+    def __init__(self, gamemap: GameMap):
+        self.gamemap = gamemap
+        self.time = 0
+        self._queue: List[Tuple[int, int, Actor]] = []
+        self._next_time: Dict[Actor, int] = {}  # Time of the only valid heap entry of each actor.
+        self._seq = 0  # Tie breaker, keeps actors with equal times in scheduling order.
+
+    def __len__(self) -> int:
+        return len(self._next_time)
+
+    def schedule(self, actor: Actor, delay: int = 0) -> None:
+        """Schedule the next action of `actor` in `delay` time units, replacing any earlier entry."""
+        time = self.time + delay
+        self._next_time[actor] = time
+        heapq.heappush(self._queue, (time, self._seq, actor))
+        self._seq += 1
+
+    def unschedule(self, actor: Actor) -> None:
+        """Forget the pending action of `actor`, its heap entry becomes stale."""
+        self._next_time.pop(actor, None)
+
+    def is_scheduled(self, actor: Actor) -> bool:
+        return actor in self._next_time
+
+    def pop_due(self, until: int) -> List[Actor]:
+        """
+        Pop every actor due at the earliest scheduled time before `until`, and move the clock to that time.
+
+        Dead and removed actors are dropped on the way. Returns an empty list if no actor is due.
+        """
+        due: List[Actor] = []
+
+        while self._queue and self._queue[0][0] < until:
+            time = self._queue[0][0]
+            if due and time != self.time:
+                break  # Only actors due at the same time are popped together.
+
+            _, _, actor = heapq.heappop(self._queue)
+            if self._next_time.get(actor) != time:
+                continue  # Stale entry of a rescheduled or unscheduled actor.
+
+            del self._next_time[actor]
+            if not actor.is_alive or actor.parent is not self.gamemap:
+                continue
+
+            self.time = time
+            due.append(actor)
+
+        return due
+
+    def advance(self, duration: int, act: Callable[[List[Actor]], List[Optional[int]]]) -> None:
+        """
+        Move the clock `duration` time units forward, letting every actor due before then act in time order.
+
+        `act` performs the turns of a group of actors due at the same time. It returns for each of them
+        the delay until its next action, or None if the actor should not be rescheduled.
+        """
+        until = self.time + duration
+
+        while True:
+            due = self.pop_due(until)
+            if not due:
+                break
+
+            for actor, delay in zip(due, act(due)):
+                if delay is not None and actor not in self._next_time:
+                    self.schedule(actor, delay)
+
+        self.time = until
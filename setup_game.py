@@ -19,7 +19,10 @@ def load_game(filename: str) -> Engine:
     assert isinstance(engine, Engine)
     return engine
 
-def new_game(max_rooms, room_min_size, room_max_size, map_height, map_width) -> Engine:
+def new_game(
+    max_rooms, room_min_size, room_max_size, map_height, map_width, generator="rooms", use_actor_store=False,
+    corpse_decay=None, chunk_dir=None,
+) -> Engine:
     """Return a brand new game session as an Engine instance."""
     player = copy.deepcopy(entity_factories.player)
 
@@ -32,6 +35,10 @@ def new_game(max_rooms, room_min_size, room_max_size, map_height, map_width) ->
         map_height=map_height,
         map_width=map_width,
         engine=engine,
+        generator=generator,
+        use_actor_store=use_actor_store,
+        corpse_decay=corpse_decay,
+        chunk_dir=chunk_dir,
     )
     engine.game_world.generate_floor()
     engine.update_fov()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import copy
+from typing import Dict, List, Tuple
+
+_IMMUTABLE = frozenset({int, float, str, bool, type(None)})
+
+_slot_names: Dict[type, Tuple[str, ...]] = {}
+
+
+class _Missing:
+    """Marks a slot that has not been set yet, like `parent` of an entity template."""
+
+    def __reduce__(self):
+        return "_MISSING"
+
+
+_MISSING = _Missing()
+
+
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """Return every slot declared by `cls` and its bases."""
+    names = _slot_names.get(cls)
+    if names is None:
+        names = tuple(
+            name
+            for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+        )
+        _slot_names[cls] = names
+    return names
+
+
+class Slotted:
+    """
+    Base class for the compact game objects that declare `__slots__`.
+
+    Entities are deep-copied from templates on every spawn and pickled on every save.
+    Copying the slots directly, sharing immutable values instead of going through `copy.deepcopy`
+    for each of them, and pickling the state as a plain list of slot values keeps both cheap.
+    """
+
+    __slots__ = ()
+
+    def __deepcopy__(self, memo: dict):
+        cls = type(self)
+        clone = cls.__new__(cls)
+        memo[id(self)] = clone
+
+        for name in slot_names(cls):
+            value = getattr(self, name, _MISSING)
+            if value is _MISSING:
+                continue
+            if type(value) not in _IMMUTABLE:
+                value = copy.deepcopy(value, memo)
+            setattr(clone, name, value)
+
+        return clone
+
+    def __getstate__(self) -> List:
+        return [getattr(self, name, _MISSING) for name in slot_names(type(self))]
+
+    def __setstate__(self, state: List) -> None:
+        for name, value in zip(slot_names(type(self)), state):
+            if value is not _MISSING:
+                setattr(self, name, value)
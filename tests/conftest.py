@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import pytest
+
+from engine import Engine
+import floors
+
+
+@pytest.fixture(autouse=True)
+def seeded() -> None:
+    floors.reseed()
+
+
+def open_floor(width: int = 20, height: int = 20, **kwargs) -> Engine:
+    """A floor without any wall but the border, the player standing at (5, 5)."""
+    return floors.open_floor(width, height, player_at=(5, 5), **kwargs)
+
+
+@pytest.fixture
+def make_floor() -> Callable[..., Engine]:
+    return open_floor
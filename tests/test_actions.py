@@ -0,0 +1,52 @@
+import pytest
+
+from actions import ActionResult, BumpAction, MeleeAction, MovementAction
+import entity_factories
+import exceptions
+import tiles
+
+
+def test_movement_into_walls_items_and_actors_is_blocked(make_floor):
+    engine = make_floor()
+    player, game_map = engine.player, engine.game_map
+    game_map.set_tiles((6, 5), tiles.wall)
+    entity_factories.orc.spawn(game_map, 4, 5)
+    entity_factories.health_potion.spawn(game_map, 5, 6)
+
+    assert MovementAction(player, 1, 0).validate() is ActionResult.BLOCKED
+    assert MovementAction(player, -1, 0).validate() is ActionResult.BLOCKED
+    assert MovementAction(player, 0, 1).can_perform()  # Items do not block.
+
+
+def test_movement_out_of_bounds_is_blocked(make_floor):
+    engine = make_floor()
+    player = engine.player
+    player.place(0, 0, engine.game_map)
+    assert not MovementAction(player, -1, 0).can_perform()
+    with pytest.raises(exceptions.Impossible, match=ActionResult.BLOCKED.value):
+        MovementAction(player, -1, 0).perform()
+    assert (player.x, player.y) == (0, 0)
+
+
+def test_melee_without_target(make_floor):
+    engine = make_floor()
+    player, game_map = engine.player, engine.game_map
+    orc = entity_factories.orc.spawn(game_map, 6, 5)
+    orc.fighter.die()  # Its remains are no target.
+
+    action = MeleeAction(player, 1, 0)
+    assert action.validate() is ActionResult.NO_TARGET
+    with pytest.raises(exceptions.Impossible, match=ActionResult.NO_TARGET.value):
+        action.perform()
+
+
+def test_bump_validates_what_it_resolves_to(make_floor):
+    engine = make_floor()
+    player, game_map = engine.player, engine.game_map
+    entity_factories.orc.spawn(game_map, 6, 5)
+    game_map.set_tiles((4, 5), tiles.wall)
+
+    assert isinstance(BumpAction(player, 1, 0).resolve(), MeleeAction)
+    assert BumpAction(player, 1, 0).can_perform()
+    assert BumpAction(player, -1, 0).validate() is ActionResult.BLOCKED
+    assert BumpAction(player, 0, 1).can_perform()
@@ -0,0 +1,30 @@
+import entity_factories
+import tiles
+from activation import COMBAT_NOISE_RADIUS, PROXIMITY_RADIUS
+
+
+def test_woken_actor_stays_awake(make_floor):
+    engine = make_floor()
+    game_map = engine.game_map
+    game_map.set_tiles((7, slice(1, -1)), tiles.wall)  # Out of the player's sight.
+    orc = entity_factories.orc.spawn(game_map, 8, 5)
+    engine.update_fov()
+    assert orc in game_map.dormant
+
+    orc.ai.idle_turns = orc.ai.turns_to_sleep  # As it was when it fell asleep.
+    assert game_map.wake_actors(engine.player.x, engine.player.y, PROXIMITY_RADIUS + 1) == 1
+
+    engine.handle_enemy_turns()
+    assert orc not in game_map.dormant
+    assert game_map.scheduler.is_scheduled(orc)
+
+
+def test_noise_wakes_actors_in_radius(make_floor):
+    engine = make_floor(40, 20)
+    game_map = engine.game_map
+    near = entity_factories.orc.spawn(game_map, 5 + COMBAT_NOISE_RADIUS, 15)
+    far = entity_factories.orc.spawn(game_map, 5 + COMBAT_NOISE_RADIUS + 10, 15)
+
+    assert game_map.wake_actors(5, 15, COMBAT_NOISE_RADIUS) == 1
+    assert near not in game_map.dormant
+    assert far in game_map.dormant
@@ -0,0 +1,77 @@
+import copy
+
+import pytest
+
+import actions
+from actor_store import StoredActor
+import batch_ai
+import entity_factories
+
+
+def test_deepcopy_keeps_the_store_of_the_copy(make_floor):
+    engine = make_floor(use_actor_store=True)
+    orc = entity_factories.orc.spawn(engine.game_map, 8, 5)
+    assert isinstance(orc, StoredActor)
+
+    clone = copy.deepcopy(orc)
+    assert clone.store is not orc.store
+    assert (clone.x, clone.y, clone.fighter.hp) == (8, 5, orc.fighter.hp)
+
+    clone.place(9, 6)
+    clone.fighter.hp -= 1
+    assert (orc.x, orc.y, orc.fighter.hp) == (8, 5, clone.fighter.hp + 1)
+
+
+def test_fireball_damages_stored_and_other_actors(make_floor):
+    engine = make_floor(use_actor_store=True)
+    game_map = engine.game_map
+    player = engine.player
+    near = entity_factories.orc.spawn(game_map, 7, 5)
+    far = entity_factories.orc.spawn(game_map, 12, 5)
+    engine.update_fov()
+
+    scroll = copy.deepcopy(entity_factories.fireball_scroll)
+    scroll.parent = player.inventory
+    player.inventory.items.append(scroll)
+    hp = player.fighter.hp
+    actions.ItemAction(player, scroll, (6, 5)).perform()
+
+    damage = scroll.consumable.damage
+    assert player.fighter.hp == max(hp - damage, 0)
+    assert not near.is_alive  # An orc has fewer hit points than the blast deals.
+    assert far.is_alive
+    assert game_map.get_actor_at_location(7, 5) is None
+
+
+def test_batch_chase_moves_stored_actors(make_floor):
+    engine = make_floor(30, 30, use_actor_store=True)
+    game_map = engine.game_map
+    orcs = [entity_factories.orc.spawn(game_map, 15 + i % 4, 15 + i // 4) for i in range(batch_ai.MIN_BATCH_SIZE)]
+    game_map.visible[:] = True
+
+    handled = batch_ai.perform_chase_turns(engine, orcs)
+    assert 0 < len(handled) < len(orcs)  # The rear rows are stuck behind the front ones.
+    positions = {(orc.x, orc.y) for orc in orcs}
+    assert len(positions) == len(orcs)  # No two actors stepped onto the same cell.
+    assert (15, 15) not in positions  # The front row stepped towards the player.
+    assert game_map.get_actor_at_location(14, 14) is orcs[0]
+
+
+@pytest.mark.parametrize("use_actor_store", [False, True])
+def test_stuck_chasers_take_their_turn_through_their_ai(make_floor, use_actor_store):
+    engine = make_floor(30, 30, use_actor_store=use_actor_store)
+    game_map = engine.game_map
+    orcs = [entity_factories.orc.spawn(game_map, 15 + i % 4, 15 + i // 4) for i in range(batch_ai.MIN_BATCH_SIZE)]
+    game_map.visible[:] = True
+    for orc in orcs:
+        orc.ai.path, orc.ai.idle_turns = [(1, 1)], 3
+
+    handled = batch_ai.perform_chase_turns(engine, orcs)
+    stuck = [orc for orc in orcs if orc not in handled]
+    assert stuck
+    assert all(orc.ai.path == [(1, 1)] and orc.ai.idle_turns == 3 for orc in stuck)
+
+    before = [(orc.x, orc.y) for orc in stuck]
+    engine.perform_ai_turns(stuck)
+    assert [(orc.x, orc.y) for orc in stuck] != before  # Some went around the crowd.
+    assert all(orc.ai.idle_turns == 0 for orc in stuck)
@@ -0,0 +1,23 @@
+import entity_factories
+import tiles
+from components.ai import PATH_MARGIN
+
+
+def test_path_around_a_detour_longer_than_the_margin(make_floor):
+    engine = make_floor(200, 10)
+    game_map = engine.game_map
+    game_map.set_tiles((slice(1, 150), 5), tiles.wall)  # The two halves only meet past x=150.
+    orc = entity_factories.orc.spawn(game_map, 20, 3)
+
+    path = orc.ai.get_path_to(20, 7)
+    assert len(path) >= 2 * (150 - 20) > 4 + PATH_MARGIN
+    assert path[-1] == (20, 7)
+
+
+def test_no_path_to_a_walled_off_cell(make_floor):
+    engine = make_floor(60, 10)
+    game_map = engine.game_map
+    game_map.set_tiles((slice(1, -1), 5), tiles.wall)
+    orc = entity_factories.orc.spawn(game_map, 20, 3)
+
+    assert orc.ai.get_path_to(20, 7) == []
@@ -0,0 +1,50 @@
+import numpy as np  # type: ignore
+import pytest
+
+from bitlayer import BitLayer
+import tiles
+import travel
+
+
+def test_set_cells_from_an_array_of_values():
+    layer = BitLayer(5, 4)
+    xs, ys = np.array([0, 1, 4]), np.array([0, 2, 3])
+    layer[xs, ys] = np.array([True, False, True])
+    assert layer[xs, ys].tolist() == [True, False, True]
+
+    layer[xs, ys] = np.array([False, True, False])
+    assert layer.count() == 1 and layer[1, 2]
+
+
+def test_boolean_mask_index():
+    layer = BitLayer(5, 4)
+    mask = np.zeros((5, 4), dtype=bool)
+    mask[1:3, 1:3] = True
+    layer[mask] = True
+    assert np.array_equal(layer.to_array(), mask)
+
+    layer[mask] = np.array([True, False, False, True])
+    assert layer[mask].tolist() == [True, False, False, True]
+    assert layer.count() == 2
+
+
+@pytest.mark.parametrize("key", [(-1, 0), (0, -1), (5, 0), (0, 4)])
+def test_cells_out_of_the_layer(key):
+    layer = BitLayer(5, 4)
+    with pytest.raises(IndexError):
+        layer[key]
+    with pytest.raises(IndexError):
+        layer[key] = True
+    with pytest.raises(IndexError):
+        layer[np.array([0, key[0]]), np.array([0, key[1]])]
+
+
+def test_auto_explore_reaches_every_cell(make_floor):
+    engine = make_floor(60, 20)
+    game_map = engine.game_map
+    game_map.set_tiles((30, slice(1, 15)), tiles.wall)  # A wall to walk around.
+    engine.update_fov()
+
+    while travel.auto_explore(engine):  # Each command stops after MAX_TURNS.
+        pass
+    assert not (game_map.walkable & ~game_map.explored).any()
@@ -0,0 +1,89 @@
+import lzma
+import os
+import pickle
+
+import numpy as np  # type: ignore
+import pytest
+
+from bitlayer import BitLayer
+from chunked import ChunkedGrid
+from engine import Engine
+from game_map import GameMap
+from setup_game import new_game
+import tiles
+
+
+def test_closed_grid_leaves_no_file(tmp_path):
+    with ChunkedGrid((100, 100), np.uint8, directory=str(tmp_path)) as grid:
+        grid[70, 3] = 5
+        assert grid[70, 3] == 5
+    assert grid._mmap is None and grid._file is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_pickled_grid_keeps_its_data(tmp_path):
+    grid = ChunkedGrid((200, 100), np.uint8, fill_value=7, directory=str(tmp_path))
+    grid[150, 3] = 5
+    grid[0:10, 90:100] = 2
+    copy = pickle.loads(pickle.dumps(grid))
+    grid.close()
+
+    assert copy[150, 3] == 5 and copy[5, 95] == 2 and copy[50, 50] == 7
+    assert np.array_equal(copy.written, grid.written)
+    copy.close()
+
+
+def test_lru_is_bounded_by_bytes(tmp_path):
+    grid = ChunkedGrid((640, 640), np.uint8, max_bytes=64 * 1024, directory=str(tmp_path))
+    grid[:, :] = 1
+    assert 0 < len(grid._chunks) * grid.chunk_stride <= grid.max_bytes
+    assert np.all(np.asarray(grid) == 1)
+    grid.close()
+
+
+def test_boolean_mask_index(tmp_path):
+    grid = ChunkedGrid((100, 100), np.uint8, directory=str(tmp_path))
+    mask = np.zeros((100, 100), dtype=bool)
+    mask[60:70, 10:20] = True
+    grid[mask] = 3
+    assert np.array_equal(np.asarray(grid) == 3, mask)
+    assert grid[mask].tolist() == [3] * 100
+    grid.close()
+
+
+def test_maps_get_their_own_chunk_file(tmp_path):
+    engine = Engine(player=None)
+    first = GameMap(engine, 100, 100, chunk_dir=str(tmp_path))
+    second = GameMap(engine, 100, 100, chunk_dir=str(tmp_path))
+
+    first.set_tiles((10, 10), tiles.floor)
+    assert second.tiles[10, 10] == tiles.wall
+    first.close()
+    second.close()
+
+
+def test_file_backed_bitlayer_pickles_its_bits(tmp_path):
+    layer = BitLayer(50, 40, directory=str(tmp_path))
+    layer[3, 4] = True
+    layer |= BitLayer.from_array(np.eye(50, 40, dtype=bool))
+    copy = pickle.loads(pickle.dumps(layer))
+    assert copy.directory == str(tmp_path) and copy == layer
+    assert copy[3, 4] and copy[10, 10] and not copy[10, 11]
+
+
+@pytest.mark.parametrize("generator", ["rooms", "caves"])
+def test_new_game_on_chunked_floors(tmp_path, generator):
+    engine = new_game(30, 6, 10, 60, 80, generator=generator, chunk_dir=str(tmp_path))
+    game_map = engine.game_map
+    assert isinstance(game_map.tiles, ChunkedGrid)
+    assert game_map.tiles[engine.player.x, engine.player.y] != tiles.wall
+    assert game_map.explored.count() > 0
+
+    saved = pickle.loads(lzma.decompress(lzma.compress(pickle.dumps(engine))))
+    assert np.array_equal(np.asarray(saved.game_map.tiles), np.asarray(game_map.tiles))
+    assert saved.game_map.explored == game_map.explored
+
+    engine.game_world.generate_floor()
+    assert game_map.tiles._file is None  # The floor left behind gave its file back.
+    engine.game_map.close()
+    saved.game_map.close()
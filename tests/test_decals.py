@@ -0,0 +1,19 @@
+import setup_game
+
+
+def test_corpse_decay_reaches_every_floor():
+    engine = setup_game.new_game(
+        max_rooms=5, room_min_size=6, room_max_size=10, map_width=40, map_height=40,
+        generator="caves", corpse_decay=50,
+    )
+    assert engine.game_map.corpse_decay == 50
+
+    engine.game_world.generate_floor()
+    game_map = engine.game_map
+    assert game_map.corpse_decay == 50
+
+    orc = next(actor for actor in game_map.actors if actor is not engine.player)
+    orc.fighter.die()
+    assert game_map.decals.at(orc.x, orc.y) is not None
+    game_map.decals.decay(game_map.scheduler.time + 50)
+    assert game_map.decals.at(orc.x, orc.y) is None
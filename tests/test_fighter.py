@@ -0,0 +1,45 @@
+import copy
+
+import entity_factories
+
+
+def test_equipment_changes_the_cached_stats(make_floor):
+    engine = make_floor()
+    fighter, equipment = engine.player.fighter, engine.player.equipment
+    assert (fighter.power, fighter.defense) == (4, 1)
+
+    sword = copy.deepcopy(entity_factories.sword)
+    armor = copy.deepcopy(entity_factories.chain_mail)
+    equipment.toggle_equip(sword, add_message=False)
+    equipment.toggle_equip(armor, add_message=False)
+    assert (fighter.power, fighter.defense) == (8, 4)
+    assert (fighter.power_bonus, fighter.defense_bonus) == (4, 3)
+
+    equipment.toggle_equip(sword, add_message=False)
+    assert (fighter.power, fighter.defense) == (4, 4)
+
+
+def test_level_ups_change_the_cached_stats(make_floor):
+    engine = make_floor()
+    fighter, level = engine.player.fighter, engine.player.level
+    assert fighter.power == 4
+
+    level.increase_power(2)
+    level.increase_defense()
+    assert (fighter.power, fighter.defense) == (6, 2)
+
+
+def test_modifiers_last_their_turns(make_floor):
+    engine = make_floor()
+    fighter = engine.player.fighter
+    fighter.add_modifier("power", 3, turns=2)
+    fighter.add_modifier("defense", -1, turns=1)
+    assert (fighter.power, fighter.defense) == (7, 0)
+
+    fighter.tick_modifiers()
+    assert (fighter.power, fighter.defense) == (7, 1)
+    assert [modifier.stat for modifier in fighter.modifiers] == ["power"]
+
+    fighter.tick_modifiers()
+    assert (fighter.power, fighter.defense) == (4, 1)
+    assert fighter.modifiers == []
@@ -0,0 +1,16 @@
+import entity_factories
+
+
+def test_item_moved_in_place_changes_stack(make_floor):
+    engine = make_floor()
+    game_map = engine.game_map
+    potion = entity_factories.health_potion.spawn(game_map, 7, 7)
+    dagger = entity_factories.dagger.spawn(game_map, 7, 7)
+
+    dagger.place(8, 7)  # Same map, no gamemap given.
+    assert game_map.item_stacks[7, 7] == [potion]
+    assert game_map.top_item_at(8, 7) is dagger
+
+    potion.place(8, 7)
+    assert (7, 7) not in game_map.item_stacks
+    assert game_map.item_stacks[8, 7] == [dagger, potion]
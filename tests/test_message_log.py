@@ -0,0 +1,91 @@
+import os
+import pickle
+
+import color
+from message_log import formatter, Message, MessageLog
+
+
+def fill(log: MessageLog, count: int, prefix: str = "message") -> None:
+    for i in range(count):
+        log.add_message(f"{prefix} {i}")
+
+
+def texts(log: MessageLog):
+    return [message.plain_text for index in reversed(range(log.page_count())) for message in log.page(index)]
+
+
+def test_save_holds_the_buffer_only(tmp_path):
+    log = MessageLog(capacity=5, spill_path=str(tmp_path / "messages.log"))
+    fill(log, 10)
+    small = len(pickle.dumps(log))
+    fill(log, 1000, prefix="more")
+    assert len(pickle.dumps(log)) < small + 100
+    log.close()
+
+
+def test_loaded_log_resumes_its_spill_file(tmp_path):
+    path = str(tmp_path / "messages.log")
+    log = MessageLog(capacity=5, spill_path=path)
+    fill(log, 12)
+    saved = pickle.dumps(log)
+    fill(log, 7, prefix="unsaved")  # Played on after the save, then quit without saving.
+    log.close()
+
+    loaded = pickle.loads(saved)
+    assert texts(loaded) == [f"message {i}" for i in range(12)]
+
+    fill(loaded, 3, prefix="more")
+    assert texts(loaded) == [f"message {i}" for i in range(12)] + [f"more {i}" for i in range(3)]
+    loaded.close()
+
+
+def test_history_of_a_replaced_spill_file_is_dropped(tmp_path):
+    path = str(tmp_path / "messages.log")
+    log = MessageLog(capacity=5, spill_path=path)
+    fill(log, 12)
+    saved = pickle.dumps(log)
+    log.close()
+
+    other = MessageLog(capacity=5, spill_path=path)  # A new game spills to the same file.
+    fill(other, 30, prefix="other")
+    other.close()
+
+    loaded = pickle.loads(saved)
+    assert texts(loaded) == [f"message {i}" for i in range(7, 12)]
+    fill(loaded, 6, prefix="more")
+    assert texts(loaded) == [f"message {i}" for i in range(7, 12)] + [f"more {i}" for i in range(6)]
+    loaded.close()
+
+    os.remove(path)
+    assert len(pickle.loads(saved)) == 5
+
+
+def test_c_conversion_capitalizes_the_argument():
+    message = Message("{0!c} hits {1}. {2!r}", color.white, args=("the orc", "you", "x"))
+    assert message.plain_text == "The orc hits you. 'x'"
+    assert formatter.format("{0!c}", 7) == "7"
+
+
+def test_repeated_templates_stack_with_equal_args():
+    log = MessageLog()
+    for _ in range(3):
+        log.add_message("{0!c} attacks {1}.", args=("orc", "you"))
+    log.add_message("{0!c} attacks {1}.", args=("troll", "you"))
+    log.add_message("".join(["{0!c} attacks ", "{1}."]), args=("troll", "you"))  # Built at run time.
+    log.add_message("{0!c} attacks {1}.", args=("troll", "you"), stack=False)
+
+    assert [(message.full_text, message.count) for message in log.latest(10)] == [
+        ("Orc attacks you. (x3)", 3),
+        ("Troll attacks you. (x2)", 2),
+        ("Troll attacks you.", 1),
+    ]
+
+
+def test_stacked_counts_survive_the_spill_file(tmp_path):
+    log = MessageLog(capacity=2, spill_path=str(tmp_path / "messages.log"))
+    log.add_message("{0} waits.", args=("you",))
+    log.add_message("{0} waits.", args=("you",))
+    fill(log, 3)
+
+    assert log.page(0, page_size=5)[0].full_text == "you waits. (x2)"
+    log.close()
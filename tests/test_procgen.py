@@ -0,0 +1,64 @@
+from collections import deque
+import random
+
+import numpy as np  # type: ignore
+import pytest
+
+from procgen import farthest_cell, largest_region
+from setup_game import new_game
+import tiles
+
+
+def distances(passable, start):
+    """Steps from `start` to every passable cell reachable in 8 directions, a plain breadth first search."""
+    width, height = passable.shape
+    steps = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cell = (x + dx, y + dy)
+                if 0 <= cell[0] < width and 0 <= cell[1] < height and passable[cell] and cell not in steps:
+                    steps[cell] = steps[(x, y)] + 1
+                    queue.append(cell)
+    return steps
+
+
+def test_largest_region_keeps_one_connected_part():
+    passable = np.zeros((8, 6), dtype=bool)
+    passable[0:2, 0:2] = True  # 4 cells
+    passable[4:8, 1] = True  # 4 cells, touching the next ones diagonally only
+    passable[3, 2:6] = True  # 4 cells
+    passable[6, 4] = True  # 1 lone cell
+
+    region = largest_region(passable)
+    assert region.shape == passable.shape
+    assert set(zip(*np.nonzero(region))) == set(distances(passable, (3, 5)))
+    assert region.sum() == 8
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_caves_are_connected(seed):
+    random.seed(seed)
+    engine = new_game(0, 0, 0, 40, 60, generator="caves")
+    game_map = engine.game_map
+    walkable = np.asarray(game_map.walkable)
+    reached = distances(walkable, (engine.player.x, engine.player.y))
+
+    assert len(reached) == walkable.sum()
+    assert not walkable[0, :].any() and not walkable[-1, :].any()
+    assert not walkable[:, 0].any() and not walkable[:, -1].any()
+
+    stairs = game_map.downstairs_location
+    assert game_map.tiles[stairs] == tiles.down_stairs
+    assert reached[stairs] == max(reached.values())
+    for actor in game_map.actors:
+        assert (actor.x, actor.y) in reached
+
+
+def test_farthest_cell_of_a_corridor():
+    passable = np.zeros((10, 3), dtype=bool)
+    passable[1:9, 1] = True
+    assert farthest_cell(passable, (3, 1)) == (8, 1)
+    assert farthest_cell(passable, (8, 1)) == (1, 1)
@@ -0,0 +1,67 @@
+import entity_factories
+from scheduler import TurnScheduler
+
+
+def spawn_orcs(engine, count):
+    return [entity_factories.orc.spawn(engine.game_map, 10 + i, 10) for i in range(count)]
+
+
+def test_actors_due_together_act_in_scheduling_order(make_floor):
+    engine = make_floor()
+    scheduler = TurnScheduler(engine.game_map)
+    a, b, c, d = spawn_orcs(engine, 4)
+    for actor in (b, a, c):
+        scheduler.schedule(actor, 10)
+    scheduler.schedule(d, 5)
+
+    assert scheduler.pop_due(100) == [d]
+    assert scheduler.time == 5
+    assert scheduler.pop_due(100) == [b, a, c]
+    assert scheduler.time == 10
+    assert scheduler.pop_due(100) == [] and len(scheduler) == 0
+
+
+def test_actors_due_at_the_limit_wait(make_floor):
+    engine = make_floor()
+    scheduler = TurnScheduler(engine.game_map)
+    (orc,) = spawn_orcs(engine, 1)
+    scheduler.schedule(orc, 10)
+
+    assert scheduler.pop_due(10) == []
+    assert scheduler.is_scheduled(orc)
+    assert scheduler.pop_due(11) == [orc]
+
+
+def test_stale_entries_are_skipped(make_floor):
+    engine = make_floor()
+    scheduler = TurnScheduler(engine.game_map)
+    moved, dropped, dead, removed = spawn_orcs(engine, 4)
+    for actor in (moved, dropped, dead, removed):
+        scheduler.schedule(actor, 5)
+    scheduler.schedule(moved, 20)  # Its first entry goes stale.
+    scheduler.unschedule(dropped)
+    dead.ai = None
+    removed.place(1, 1, make_floor().game_map)  # Taken to another floor, its entry stays in the heap.
+
+    assert scheduler.pop_due(100) == [moved]
+    assert scheduler.time == 20
+    assert len(scheduler) == 0 and not scheduler._queue
+
+
+def test_advance_reschedules_with_the_returned_delays(make_floor):
+    engine = make_floor()
+    scheduler = TurnScheduler(engine.game_map)
+    fast, slow, once = spawn_orcs(engine, 3)
+    for actor in (fast, slow, once):
+        scheduler.schedule(actor)
+    delays = {fast: 50, slow: 100, once: None}
+    turns = []
+
+    def act(due):
+        turns.append((scheduler.time, due))
+        return [delays[actor] for actor in due]
+
+    scheduler.advance(150, act)
+    assert turns == [(0, [fast, slow, once]), (50, [fast]), (100, [slow, fast])]  # slow was rescheduled first.
+    assert scheduler.time == 150
+    assert not scheduler.is_scheduled(once)
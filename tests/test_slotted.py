@@ -0,0 +1,54 @@
+import copy
+import pickle
+
+import entity_factories
+from slotted import Slotted, slot_names
+
+
+class Point(Slotted):
+    __slots__ = ("x", "y")
+
+
+class Tagged(Point):
+    __slots__ = ("tags", "parent")
+
+
+def test_slot_names_include_the_bases():
+    assert slot_names(Tagged) == ("x", "y", "tags", "parent")
+
+
+def test_deepcopy_shares_immutables_and_copies_the_rest():
+    point = Tagged()
+    point.x, point.y, point.tags = 1, "two", ["a"]
+    clone = copy.deepcopy(point)
+
+    assert (clone.x, clone.y, clone.tags) == (1, "two", ["a"])
+    assert clone.tags is not point.tags
+    assert not hasattr(clone, "parent")
+
+
+def test_deepcopy_keeps_cycles():
+    parent, child = Tagged(), Tagged()
+    child.parent, parent.tags = parent, [child]
+    clone = copy.deepcopy(parent)
+    assert clone.tags[0].parent is clone
+
+
+def test_pickle_round_trip_keeps_unset_slots_unset():
+    point = Tagged()
+    point.x, point.tags = 3, {"b": 1}
+    clone = pickle.loads(pickle.dumps(point))
+
+    assert (clone.x, clone.tags) == (3, {"b": 1})
+    assert not hasattr(clone, "y") and not hasattr(clone, "parent")
+
+
+def test_spawned_actor_round_trips(make_floor):
+    engine = make_floor()
+    orc = entity_factories.orc.spawn(engine.game_map, 8, 8)
+    orc.fighter.take_damage(3)
+    clone = pickle.loads(pickle.dumps(engine)).game_map.get_actor_at_location(8, 8)
+
+    assert clone.name == orc.name and clone.fighter.hp == orc.fighter.hp
+    assert clone.fighter.parent is clone and clone.ai.entity is clone
+    assert clone.parent.engine.player.parent is clone.parent
@@ -0,0 +1,35 @@
+import numpy as np  # type: ignore
+import pytest
+
+import tiles
+
+TILES = {"floor": tiles.floor, "wall": tiles.wall, "down_stairs": tiles.down_stairs}
+
+
+def test_palette_arrays_line_up():
+    assert len(tiles.WALKABLE) == len(tiles.TRANSPARENT) == len(tiles.GLYPH) == len(TILES)
+    assert tiles.WALKABLE.dtype == tiles.TRANSPARENT.dtype == bool
+    assert tiles.GLYPH.dtype == np.uint32
+    assert sorted(int(index) for index in TILES.values()) == list(range(len(TILES)))
+    assert all(isinstance(index, np.uint8) for index in TILES.values())
+
+
+def test_palette_properties():
+    assert tiles.WALKABLE[tiles.floor] and tiles.TRANSPARENT[tiles.floor]
+    assert not tiles.WALKABLE[tiles.wall] and not tiles.TRANSPARENT[tiles.wall]
+    assert tiles.WALKABLE[tiles.down_stairs] and tiles.TRANSPARENT[tiles.down_stairs]
+    assert [chr(tiles.GLYPH[index]) for index in TILES.values()] == [" ", "+", ">"]
+
+
+def test_map_layers_are_palette_lookups(make_floor):
+    game_map = make_floor().game_map
+    game_map.set_tiles((3, 3), tiles.down_stairs)
+    assert np.array_equal(game_map.walkable, tiles.WALKABLE[game_map.tiles])
+    assert np.array_equal(game_map.transparent, tiles.TRANSPARENT[game_map.tiles])
+    assert game_map.walkable[3, 3] and not game_map.walkable[0, 0]
+
+
+def test_palette_holds_at_most_256_tiles(monkeypatch):
+    monkeypatch.setattr(tiles, "GLYPH", np.zeros(256, dtype=np.uint32))
+    with pytest.raises(ValueError):
+        tiles.new_tile(walkable=True, transparent=True, tile=ord("."))
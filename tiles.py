@@ -1,22 +1,34 @@
-from typing import Tuple
+"""
+Tile types, kept in a palette.
 
+Maps store one `uint8` palette index per cell. The properties of each tile type live in the
+small palette arrays below, so boolean layers for a whole map are derived with one lookup,
+like `WALKABLE[game_map.tiles]`.
+"""
 import numpy as np  # type: ignore
 
+WALKABLE = np.zeros(0, dtype=bool)  # True if this tile can be walked over.
+TRANSPARENT = np.zeros(0, dtype=bool)  # True if this tile doesn't block FOV.
+GLYPH = np.zeros(0, dtype=np.uint32)  # Tile ID, the code point of the character that stands for the tile.
 
-tile_dt = np.dtype([
-    ('walkable', bool),  # True if this tile can be walked over.
-    ('transparent', bool),  # True if this tile doesn't block FOV.
-    ('tile', int),  # Tile ID
-])
 
 def new_tile(
     *,  # Enforce the use of keywords, so that parameter order doesn't matter.
     walkable: int,
     transparent: int,
     tile: int,
-) -> np.ndarray:
-    """Helper function for defining individual tile types """
-    return np.array((walkable, transparent, tile), dtype=tile_dt)
+) -> np.uint8:
+    """Helper function for defining individual tile types, returns the palette index of the new type."""
+    global WALKABLE, TRANSPARENT, GLYPH
+
+    index = len(GLYPH)
+    if index > np.iinfo(np.uint8).max:
+        raise ValueError("Too many tile types")
+
+    WALKABLE = np.append(WALKABLE, bool(walkable))
+    TRANSPARENT = np.append(TRANSPARENT, bool(transparent))
+    GLYPH = np.append(GLYPH, np.uint32(tile))
+    return np.uint8(index)
 
 floor = new_tile(
     walkable=True,
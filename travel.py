@@ -0,0 +1,159 @@
+"""
+Commands that take many turns: running in a direction, travelling to a cell and exploring.
+
+Each of them repeats single steps of the player until it is done or something interrupts it:
+a monster comes into view, the player gets hurt, levels up or dies, or reaches something
+worth a look. Nothing is drawn in between, the screen is redrawn once when the command stops.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import actions
+import color
+from components.ai import UNREACHABLE, distance_map
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+MAX_TURNS = 200  # A command stops after this many turns, whatever happens.
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+Perform = Callable[[actions.Action], bool]
+Step = Optional[Tuple[int, int]]
+
+
+def monsters_in_view(engine: Engine) -> bool:
+    game_map = engine.game_map
+    return any(
+        actor is not engine.player and game_map.visible[actor.x, actor.y]
+        for actor in game_map.actors
+    )
+
+
+def something_here(engine: Engine) -> bool:
+    """Whether the player stands on an item or on the stairs."""
+    player = engine.player
+    game_map = engine.game_map
+    if (player.x, player.y) == game_map.downstairs_location:
+        return True
+    return game_map.top_item_at(player.x, player.y) is not None
+
+
+def repeat_steps(
+    engine: Engine,
+    next_step: Callable[[], Step],
+    perform: Optional[Perform] = None,
+    stop_on_items: bool = True,
+    max_turns: int = MAX_TURNS,
+) -> int:
+    """
+    Let the player take the steps given by `next_step` until it returns None or the player is interrupted.
+
+    Steps are performed with `perform`, `Engine.handle_player_action` by default. Returns the number of turns taken.
+    """
+    if perform is None:
+        perform = engine.handle_player_action
+
+    if monsters_in_view(engine):
+        engine.message_log.add_message("Not with monsters in view.", color.invalid)
+        return 0
+
+    player = engine.player
+    game_map = engine.game_map
+    turns = 0
+
+    while turns < max_turns:
+        step = next_step()
+        if step is None:
+            break
+
+        action = actions.BumpAction(player, *step)
+        if action.target_actor:
+            break  # Never attack something by accident.
+
+        hp = player.fighter.hp
+        if not perform(action):
+            break
+        turns += 1
+
+        if (
+            not player.is_alive
+            or player.fighter.hp < hp
+            or player.level.requires_level_up
+            or engine.game_map is not game_map
+            or monsters_in_view(engine)
+            or (stop_on_items and something_here(engine))
+        ):
+            break
+
+    return turns
+
+
+def run(engine: Engine, dx: int, dy: int, perform: Optional[Perform] = None) -> int:
+    """Step in one direction until blocked, or until standing on something."""
+
+    def next_step() -> Step:
+        if not actions.MovementAction(engine.player, dx, dy).can_perform():
+            return None
+        return dx, dy
+
+    return repeat_steps(engine, next_step, perform)
+
+
+def downhill(distance: np.ndarray, x: int, y: int) -> Step:
+    """The step from (x, y) to the neighbour closest to the goals, if any is closer than (x, y)."""
+    width, height = distance.shape
+    best, best_distance = None, distance[x, y]
+    for dx, dy in DIRECTIONS:
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < width and 0 <= ny < height and distance[nx, ny] < best_distance:
+            best, best_distance = (dx, dy), distance[nx, ny]
+    return best
+
+
+def travel(engine: Engine, x: int, y: int, perform: Optional[Perform] = None) -> int:
+    """Walk to a known cell along the shortest path through explored cells."""
+    game_map = engine.game_map
+    known = game_map.explored & game_map.walkable
+
+    distance = None
+    if game_map.in_bounds(x, y) and known[x, y]:
+        goals = np.zeros(known.shape, dtype=bool)
+        goals[x, y] = True
+        distance = distance_map(known, goals)
+    if distance is None or distance[engine.player.x, engine.player.y] == UNREACHABLE:
+        engine.message_log.add_message("You don't know the way there.", color.invalid)
+        return 0
+
+    def next_step() -> Step:
+        return downhill(distance, engine.player.x, engine.player.y)
+
+    return repeat_steps(engine, next_step, perform, stop_on_items=False)
+
+
+def auto_explore(engine: Engine, perform: Optional[Perform] = None) -> int:
+    """Walk towards the nearest unexplored cell, until everything that can be reached is explored."""
+    distance = None
+    distance_map_of = None  # The floor `distance` was computed on.
+
+    def next_step() -> Step:
+        nonlocal distance, distance_map_of
+        player = engine.player
+        game_map = engine.game_map
+
+        # Unexplored cells are the goals, the way there goes through explored ones.
+        # They only change when the last turn explored new cells, or on a new floor.
+        if distance is None or distance_map_of is not game_map or game_map.newly_explored.any():
+            walkable = game_map.walkable
+            distance = distance_map(game_map.explored & walkable, ~game_map.explored & walkable)
+            distance_map_of = game_map
+        if distance[player.x, player.y] == UNREACHABLE:
+            engine.message_log.add_message("There is nothing left to explore.")
+            return None
+        return downhill(distance, player.x, player.y)
+
+    return repeat_steps(engine, next_step, perform)